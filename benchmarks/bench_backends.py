@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: coste de parseo XML-RPC vs JSON-RPC en el cliente
+
+Genera respuestas como las que devuelve Odoo (un search_read grande y la
+lectura de un adjunto con `datas` en base64) y mide, para cada backend,
+el tiempo de parseo, el pico de memoria y el tamaño en la red (con y sin gzip).
+
+Uso:
+    python3 benchmarks/bench_backends.py [--records 20000] [--pdf-mb 10] [--repeat 5]
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import time
+import tracemalloc
+import xmlrpc.client
+
+
+def make_search_read(records):
+    """Resultado típico de search_read sobre res.partner"""
+    return [{
+        'id': i,
+        'name': f"Cliente {i}",
+        'email': f"cliente{i}@ejemplo.com",
+        'active': True,
+        'credit_limit': 1000.5 + i,
+        'country_id': [10, 'Argentina'],
+        'category_id': [1, 2, 3],
+        'write_date': '2024-01-01 10:00:00',
+    } for i in range(1, records + 1)]
+
+
+def make_attachment(pdf_mb):
+    """Resultado de read de ir.attachment con el contenido en base64"""
+    content = os.urandom(pdf_mb * 1024 * 1024)
+    return [{'id': 1, 'name': 'factura.pdf', 'datas': base64.b64encode(content).decode('ascii')}]
+
+
+def encode_xmlrpc(result):
+    return xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True).encode('utf-8')
+
+
+def encode_jsonrpc(result):
+    return json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': result}).encode('utf-8')
+
+
+def parse_xmlrpc(body):
+    # Mismo camino que PooledTransport.parse_response
+    parser, unmarshaller = xmlrpc.client.getparser()
+    for start in range(0, len(body), 65536):
+        parser.feed(body[start:start + 65536])
+    parser.close()
+    return unmarshaller.close()[0]
+
+
+def parse_jsonrpc(body):
+    return json.loads(body)['result']
+
+
+def measure(parse, body, repeat):
+    """Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecución"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(body)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000, help="registros del search_read")
+    parser.add_argument('--pdf-mb', type=int, default=10, help="tamaño del PDF del adjunto (MB)")
+    parser.add_argument('--repeat', type=int, default=5, help="repeticiones por medición")
+    args = parser.parse_args()
+
+    payloads = [
+        (f"search_read ({args.records} registros)", make_search_read(args.records)),
+        (f"adjunto ({args.pdf_mb} MB de PDF)", make_attachment(args.pdf_mb)),
+    ]
+    backends = [('XML-RPC', encode_xmlrpc, parse_xmlrpc), ('JSON-RPC', encode_jsonrpc, parse_jsonrpc)]
+
+    print(f"{'Carga':<32} {'Backend':<9} {'Parseo ms':>10} {'Pico MB':>9} {'Red KB':>10} {'Gzip KB':>9}")
+    print("-" * 84)
+    for label, result in payloads:
+        for name, encode, parse in backends:
+            body = encode(result)
+            assert parse(body) == result
+            seconds, peak = measure(parse, body, args.repeat)
+            print(f"{label:<32} {name:<9} {seconds * 1000:>10.1f} {peak / 1024 / 1024:>9.1f} "
+                  f"{len(body) / 1024:>10.0f} {len(gzip.compress(body, 6)) / 1024:>9.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de extremo a extremo: orden → confirmación → PDF de facturas
+
+Levanta el Odoo simulado de fake_odoo.py en un hilo y mide, a varias
+escalas, create_sale_order_with_type, confirm_sale_order y
+download_order_invoices: órdenes/s, facturas/s y llamadas RPC por orden.
+Los PDFs se escriben en un directorio temporal.
+
+Uso:
+    python3 benchmarks/bench_flow.py [--scales 1,10,50] [--latency-ms 5] [--pdf-kb 64]
+        [--pdf-delay 0.2] [--invoices-per-order 1] [--protocol xmlrpc] [--pdf-mode wizard]
+        [--error-rate 0.05] [--bulk] [--workers 4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_odoo import FakeOdoo, FakeOdooServer  # noqa: E402
+
+AUTO_INVOICE_TYPE_ID = 2  # "Facturación automática" en los datos del servidor simulado
+
+
+def make_order(index, products, lines):
+    return {
+        'customer_id': index % 50 + 1,
+        'products': [{'product_id': (index + line) % products + 1, 'quantity': line + 1,
+                      'price': 10.0 * (line + 1)} for line in range(lines)],
+    }
+
+
+def timed(label, results, odoo, func, items):
+    """Ejecutar `func` sobre cada elemento y acumular tiempo y llamadas RPC de la fase"""
+    calls_before = odoo.stats['rpc_calls']
+    start = time.perf_counter()
+    with odoo.rpc_phase(label):
+        outputs = [func(item) for item in items]
+    results[label] = {'seconds': time.perf_counter() - start,
+                      'rpc_calls': odoo.stats['rpc_calls'] - calls_before}
+    return outputs
+
+
+def run_scale(url, orders, args):
+    """Ejecutar el flujo completo para `orders` órdenes y devolver las métricas por fase"""
+    from odoo_console import OdooConnector
+
+    odoo = OdooConnector(url, args.db, 'admin', 'admin')
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not odoo.connect():
+            raise RuntimeError("No se pudo autenticar contra el servidor simulado")
+        order_ids = timed('create', results, odoo,
+                          lambda i: odoo.create_sale_order_with_type(
+                              make_order(i, args.products, args.lines), AUTO_INVOICE_TYPE_ID),
+                          range(orders))
+        if None in order_ids:
+            raise RuntimeError("Falló la creación de alguna orden")
+        if args.bulk:
+            timed('confirm', results, odoo, odoo.confirm_sale_orders, [order_ids])
+        else:
+            timed('confirm', results, odoo, odoo.confirm_sale_order, order_ids)
+        if args.bulk:
+            downloaded = timed('pdf', results, odoo,
+                               lambda ids: odoo.download_invoices(ids, max_wait=args.max_wait,
+                                                                  workers=args.workers),
+                               [order_ids])
+            files = [[r['filename'] for r in downloaded[0].values() if r['filename']]]
+        else:
+            files = timed('pdf', results, odoo,
+                          lambda order_id: odoo.download_order_invoices(order_id, max_wait=args.max_wait,
+                                                                        workers=args.workers),
+                          order_ids)
+    odoo.close()
+    results['invoices'] = sum(len(f) for f in files)
+    results['retries'] = odoo.retry_policy.stats['retries']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default='1,10,50', help="cantidades de órdenes, separadas por comas")
+    parser.add_argument('--lines', type=int, default=3, help="líneas por orden")
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=5, help="latencia simulada por petición")
+    parser.add_argument('--pdf-kb', type=int, default=64)
+    parser.add_argument('--pdf-delay', type=float, default=0.2,
+                        help="segundos hasta que aparece cada adjunto generado")
+    parser.add_argument('--invoices-per-order', type=int, default=1)
+    parser.add_argument('--max-wait', type=float, default=30)
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help="proporción de peticiones respondidas con 503 por el servidor simulado")
+    parser.add_argument('--bulk', action='store_true',
+                        help="confirmar con confirm_sale_orders (por bloques) y descargar los PDFs de todas "
+                             "las órdenes con download_invoices, en vez de orden por orden")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="descargas de PDF simultáneas (por defecto ODOO_DOWNLOAD_WORKERS o 4)")
+    parser.add_argument('--protocol', choices=['xmlrpc', 'jsonrpc'], default='xmlrpc')
+    parser.add_argument('--pdf-mode', choices=['wizard', 'report'], default='wizard')
+    args = parser.parse_args()
+    args.db = 'fake'
+
+    workdir = tempfile.mkdtemp(prefix='bench_flow_')
+    os.environ.update({
+        'ODOO_PROTOCOL': args.protocol,
+        'ODOO_PDF_MODE': args.pdf_mode,
+        'ODOO_CACHE_DIR': os.path.join(workdir, 'cache'),
+    })
+    os.chdir(workdir)
+
+    print(f"Protocolo: {args.protocol} - Modo PDF: {args.pdf_mode} - Latencia: {args.latency_ms} ms - "
+          f"PDF: {args.pdf_kb} KB (demora {args.pdf_delay}s) - Directorio: {workdir}")
+    print(f"{'Órdenes':>8} {'Fase':<8} {'Segundos':>9} {'Órdenes/s':>10} {'Facturas/s':>11} "
+          f"{'RPC/orden':>10} {'RPC servidor':>13}")
+    print("-" * 76)
+    for orders in [int(s) for s in args.scales.split(',') if s.strip()]:
+        odoo = FakeOdoo(args.db, partners=50, products=args.products, latency=args.latency_ms / 1000,
+                        pdf_size=args.pdf_kb * 1024, pdf_delay=args.pdf_delay,
+                        invoices_per_order=args.invoices_per_order, error_rate=args.error_rate)
+        server = FakeOdooServer(odoo).start()
+        try:
+            results = run_scale(server.url, orders, args)
+        finally:
+            server.stop()
+
+        for phase in ('create', 'confirm', 'pdf'):
+            seconds = results[phase]['seconds']
+            invoices_rate = f"{results['invoices'] / seconds:>11.1f}" if phase == 'pdf' else f"{'-':>11}"
+            print(f"{orders:>8} {phase:<8} {seconds:>9.2f} {orders / seconds:>10.1f} {invoices_rate} "
+                  f"{results[phase]['rpc_calls'] / orders:>10.1f} {'':>13}")
+        total = sum(results[phase]['seconds'] for phase in ('create', 'confirm', 'pdf'))
+        print(f"{orders:>8} {'total':<8} {total:>9.2f} {orders / total:>10.1f} "
+              f"{results['invoices'] / total:>11.1f} "
+              f"{sum(results[p]['rpc_calls'] for p in ('create', 'confirm', 'pdf')) / orders:>10.1f} "
+              f"{odoo.stats['rpc_calls']:>13}")
+        if args.error_rate:
+            print(f"{'':>8} 503 inyectados: {odoo.stats['injected_errors']} - "
+                  f"reintentos del cliente: {results['retries']}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: arranque en frío vs en caliente de la línea de comandos
+
+Ejecuta `odoo_console.py --timings <subcomando>` varias veces como proceso
+nuevo. En frío se autentica siempre (--no-auth-cache); en caliente se
+reutiliza la sesión cacheada. Usa la conexión configurada en el .env (o en
+las variables de entorno).
+
+Uso:
+    python3 benchmarks/bench_startup.py [--runs 5] [-- partners list --limit 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'odoo_console.py')
+
+
+def run_once(command, cold):
+    """Ejecutar el CLI una vez y devolver (ms de pared, timings informados)"""
+    argv = [sys.executable, SCRIPT, '--timings'] + (['--no-auth-cache'] if cold else []) + command
+    start = time.perf_counter()
+    completed = subprocess.run(argv, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"El comando falló: {completed.stdout.strip() or completed.stderr.strip()}")
+    return wall_ms, json.loads(completed.stdout).get('timings', {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('command', nargs='*', default=['partners', 'list', '--limit', '5'],
+                        help="subcomando a medir (por defecto: partners list --limit 5)")
+    args = parser.parse_args()
+
+    # Una ejecución autenticada deja la sesión en caché para las mediciones en caliente
+    run_once(args.command, cold=False)
+
+    print(f"{'Modo':<10} {'Pared ms (mediana)':>19} {'Arranque ms':>12} {'Llamadas RPC':>13} {'Auth':>8}")
+    print("-" * 66)
+    for label, cold in (('frío', True), ('caliente', False)):
+        results = [run_once(args.command, cold) for _ in range(args.runs)]
+        walls = [wall for wall, _ in results]
+        startups = [timings.get('startup_ms', 0) for _, timings in results]
+        last = results[-1][1]
+        print(f"{label:<10} {statistics.median(walls):>19.1f} {statistics.median(startups):>12.1f} "
+              f"{last.get('rpc_calls', 0):>13} {last.get('auth', '-'):>8}")
+
+
+if __name__ == "__main__":
+    main()
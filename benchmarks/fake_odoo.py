@@ -0,0 +1,711 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor Odoo simulado para benchmarks de extremo a extremo
+
+Implementa en memoria las llamadas que hace odoo_console.py:
+authenticate/version, search/read/search_read/create/write/fields_get,
+action_confirm (con facturación automática según sale.order.type), el
+wizard "Enviar e imprimir" (account.move.send), el wizard de facturación
+(sale.advance.payment.inv) e ir.attachment. También responde a /jsonrpc,
+/web/session/authenticate y /report/pdf. Cada PDF generado se publica
+también con un mail.message en el chatter de la factura.
+
+Latencia por petición, tamaño de los PDFs, demora con la que aparecen los
+adjuntos generados y proporción de respuestas 503 (Odoo saturado) son
+configurables.
+
+Uso:
+    python3 benchmarks/fake_odoo.py [--port 8069] [--latency-ms 20] [--pdf-kb 64] [--pdf-delay 1.5]
+
+    ODOO_URL=http://127.0.0.1:8069 ODOO_DB=fake ODOO_USERNAME=admin ODOO_PASSWORD=admin
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import xmlrpc.client
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Campos relacionales por modelo: nombre -> (tipo, comodelo, campo inverso)
+SCHEMA = {
+    'res.partner': {'name': ('char',), 'email': ('char',), 'active': ('boolean',)},
+    'product.product': {'name': ('char',), 'list_price': ('float',), 'default_code': ('char',),
+                        'active': ('boolean',)},
+    'sale.order.type': {'name': ('char',), 'active': ('boolean',), 'auto_invoice': ('boolean',),
+                        'invoice_policy': ('selection',)},
+    'sale.order': {
+        'name': ('char',), 'state': ('selection',), 'date_order': ('datetime',),
+        'client_order_ref': ('char',), 'amount_total': ('float',), 'invoice_status': ('selection',),
+        'partner_id': ('many2one', 'res.partner'),
+        'type_id': ('many2one', 'sale.order.type'),
+        'order_line': ('one2many', 'sale.order.line', 'order_id'),
+        'invoice_ids': ('many2many', 'account.move'),
+    },
+    'sale.order.line': {
+        'order_id': ('many2one', 'sale.order'), 'product_id': ('many2one', 'product.product'),
+        'product_uom_qty': ('float',), 'price_unit': ('float',),
+    },
+    'account.move': {
+        'name': ('char',), 'state': ('selection',), 'amount_total': ('float',),
+        'invoice_origin': ('char',), 'move_type': ('selection',),
+        'partner_id': ('many2one', 'res.partner'),
+    },
+    'account.move.send': {'move_ids': ('many2many', 'account.move'), 'enable_download': ('boolean',),
+                          'enable_send_mail': ('boolean',), 'mail_template_id': ('integer',)},
+    'sale.advance.payment.inv': {'advance_payment_method': ('selection',),
+                                 'deduct_down_payments': ('boolean',),
+                                 'sale_order_ids': ('many2many', 'sale.order')},
+    'ir.attachment': {
+        'name': ('char',), 'mimetype': ('char',), 'checksum': ('char',), 'file_size': ('integer',),
+        'res_model': ('char',), 'res_id': ('integer',), 'datas': ('binary',),
+    },
+    'ir.actions.report': {'name': ('char',), 'report_name': ('char',), 'model': ('char',)},
+    'ir.module.module': {'name': ('char',), 'state': ('selection',), 'latest_version': ('char',)},
+    'mail.message': {'model': ('char',), 'res_id': ('integer',), 'date': ('datetime',),
+                     'attachment_ids': ('many2many', 'ir.attachment')},
+}
+
+# Campos que tienen todos los modelos
+COMMON_FIELDS = {'id': ('integer',), 'create_date': ('datetime',), 'write_date': ('datetime',),
+                 'display_name': ('char',)}
+
+PDF_MIMETYPE = 'application/pdf'
+
+
+class OdooError(Exception):
+    """Error que se devuelve al cliente como Fault (XML-RPC) o error (JSON-RPC)"""
+
+    def __init__(self, message, code=1):
+        super().__init__(message)
+        self.code = code
+
+
+def now_string():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def like(value, pattern, case_sensitive=False):
+    """Operadores like/ilike: subcadena, o patrón SQL si contiene % o _"""
+    value = '' if value in (None, False) else str(value)
+    pattern = str(pattern)
+    if not case_sensitive:
+        value, pattern = value.lower(), pattern.lower()
+    if '%' not in pattern and '_' not in pattern:
+        return pattern in value
+    regex = ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    return re.fullmatch(regex, value, re.S) is not None
+
+
+def match_leaf(record, leaf):
+    """Evaluar una condición (campo, operador, valor) sobre un registro"""
+    field, operator, value = leaf
+    current = record.get(field, False)
+    if isinstance(current, list):
+        # Campo x2many: la condición se cumple si algún ID coincide
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if operator in ('=', 'in'):
+            return bool(set(current) & set(values)) if value is not False else not current
+        if operator in ('!=', 'not in'):
+            return not set(current) & set(values) if value is not False else bool(current)
+        raise OdooError(f"Operador {operator} no soportado en {field}")
+
+    if operator == '=':
+        return current == value
+    if operator == '!=':
+        return current != value
+    if operator == 'in':
+        return current in value
+    if operator == 'not in':
+        return current not in value
+    if operator in ('like', 'ilike', '=like', '=ilike'):
+        pattern = value if operator.startswith('=') else f"%{value}%"
+        return like(current, pattern, case_sensitive=operator.endswith('like') and 'i' not in operator)
+    if operator in ('not like', 'not ilike'):
+        return not like(current, f"%{value}%", case_sensitive=operator == 'not like')
+    if current is False or current is None:
+        return False
+    if operator == '>':
+        return current > value
+    if operator == '>=':
+        return current >= value
+    if operator == '<':
+        return current < value
+    if operator == '<=':
+        return current <= value
+    raise OdooError(f"Operador no soportado: {operator}")
+
+
+def match_domain(record, domain):
+    """Evaluar un dominio de Odoo en notación polaca ('&', '|', '!'; AND implícito)"""
+    stack = []
+    for item in reversed(domain):
+        if item == '&':
+            stack.append(stack.pop() and stack.pop())
+        elif item == '|':
+            first, second = stack.pop(), stack.pop()
+            stack.append(first or second)
+        elif item == '!':
+            stack.append(not stack.pop())
+        elif isinstance(item, (list, tuple)) and len(item) == 3:
+            stack.append(match_leaf(record, item))
+        else:
+            raise OdooError(f"Dominio no válido: {item!r}")
+    return all(stack)
+
+
+def make_pdf(seed, size):
+    """Contenido PDF sintético y determinista de `size` bytes"""
+    header = f"%PDF-1.4\n% factura simulada {seed}\n".encode('ascii')
+    body = random.Random(seed).randbytes(max(0, size - len(header) - 6))
+    return header + body + b"\n%%EOF"
+
+
+class FakeOdoo:
+    """Base de datos Odoo en memoria con los modelos y métodos que usa el conector
+
+    Los adjuntos PDF generados por el wizard "Enviar e imprimir" solo son
+    visibles `pdf_delay` segundos después, como con la cola de Odoo.
+    """
+
+    def __init__(self, db='fake', login='admin', password='admin', partners=50, products=20,
+                 latency=0.0, pdf_size=64 * 1024, pdf_delay=1.0, invoices_per_order=1, error_rate=0.0):
+        self.db = db
+        self.login = login
+        self.password = password
+        self.uid = 2
+        self.latency = latency
+        self.pdf_size = pdf_size
+        self.pdf_delay = pdf_delay
+        self.invoices_per_order = max(1, invoices_per_order)
+        self.error_rate = error_rate
+        self.lock = threading.RLock()
+        self.tables = {model: {} for model in SCHEMA}
+        self.next_ids = Counter()
+        self.sessions = set()
+        self.stats = Counter()
+        self.seed_data(partners, products)
+
+    # --- Datos iniciales ---
+
+    def seed_data(self, partners, products):
+        for i in range(1, partners + 1):
+            self.insert('res.partner', {'name': f"Cliente {i:05d}", 'email': f"cliente{i}@ejemplo.com",
+                                        'active': True})
+        for i in range(1, products + 1):
+            self.insert('product.product', {'name': f"Producto {i:04d}", 'list_price': float(10 * i),
+                                            'default_code': f"PROD-{i:04d}", 'active': True})
+        self.insert('sale.order.type', {'name': "Normal", 'active': True, 'auto_invoice': False,
+                                        'invoice_policy': 'order'})
+        self.insert('sale.order.type', {'name': "Facturación automática", 'active': True,
+                                        'auto_invoice': True, 'invoice_policy': 'order'})
+        self.insert('ir.actions.report', {'name': "Facturas", 'report_name': 'account.report_invoice',
+                                          'model': 'account.move'})
+        for name in ('base', 'sale', 'account', 'sale_order_type'):
+            self.insert('ir.module.module', {'name': name, 'state': 'installed',
+                                             'latest_version': '17.0.1.0'})
+
+    # --- Almacenamiento ---
+
+    def table(self, model):
+        if model not in self.tables:
+            raise OdooError(f"Object {model} doesn't exist")
+        return self.tables[model]
+
+    def insert(self, model, values):
+        """Insertar un registro ya normalizado y devolver su ID"""
+        self.next_ids[model] += 1
+        record_id = self.next_ids[model]
+        stamp = now_string()
+        record = {'id': record_id, 'create_date': stamp, 'write_date': stamp}
+        for field, (kind, *_) in SCHEMA[model].items():
+            record[field] = [] if kind in ('one2many', 'many2many') else False
+        record.update(values)
+        self.table(model)[record_id] = record
+        return record_id
+
+    def visible(self, model, record):
+        """Los adjuntos (y sus mensajes) programados no existen hasta su hora de aparición"""
+        return record.get('available_at', 0) <= time.time()
+
+    def browse(self, model, ids):
+        table = self.table(model)
+        missing = [i for i in ids if i not in table or not self.visible(model, table[i])]
+        if missing:
+            raise OdooError(f"Record does not exist or has been deleted. ({model}: {missing})")
+        return [table[i] for i in ids]
+
+    def display_name(self, model, record_id):
+        record = self.tables[model].get(record_id)
+        return record.get('name') or f"{model},{record_id}" if record else False
+
+    # --- Métodos genéricos del ORM ---
+
+    def search(self, model, domain, offset=0, limit=None, order=None, context=None):
+        domain = list(domain or [])
+        context = context or {}
+        fields = SCHEMA[model] if model in SCHEMA else self.table(model)
+        active_test = ('active' in fields and context.get('active_test', True)
+                       and not any(isinstance(leaf, (list, tuple)) and leaf[0] == 'active' for leaf in domain))
+        records = [record for record in self.table(model).values()
+                   if self.visible(model, record)
+                   and (not active_test or record.get('active', True))
+                   and match_domain(record, domain)]
+
+        for part in reversed([p.strip() for p in (order or 'id').split(',') if p.strip()]):
+            field, _, direction = part.partition(' ')
+            records.sort(key=lambda r: (r.get(field) is False, r.get(field)),
+                         reverse=direction.strip().lower() == 'desc')
+        records = records[offset:]
+        if limit:
+            records = records[:limit]
+        return [record['id'] for record in records]
+
+    def read(self, model, ids, fields=None):
+        schema = dict(COMMON_FIELDS, **SCHEMA[model])
+        fields = [f for f in (fields or []) if f != 'id'] or [f for f in schema if f != 'datas']
+        result = []
+        for record in self.browse(model, ids):
+            row = {'id': record['id']}
+            for field in fields:
+                if field not in schema:
+                    raise OdooError(f"Invalid field {field!r} on model {model!r}")
+                kind = schema[field]
+                if field == 'display_name':
+                    row[field] = self.display_name(model, record['id'])
+                elif kind[0] == 'many2one':
+                    value = record.get(field)
+                    row[field] = [value, self.display_name(kind[1], value)] if value else False
+                elif kind[0] in ('one2many', 'many2many'):
+                    row[field] = list(record.get(field) or [])
+                else:
+                    value = record.get(field, False)
+                    row[field] = False if value is None else value
+            result.append(row)
+        return result
+
+    def normalize(self, model, values, record_id=None):
+        """Aplicar comandos x2many ((0,0,vals), (4,id), (6,0,ids)) y devolver los valores simples"""
+        plain, children = {}, []
+        for field, value in values.items():
+            kind = SCHEMA[model].get(field)
+            if kind is None:
+                raise OdooError(f"Invalid field {field!r} on model {model!r}")
+            if kind[0] not in ('one2many', 'many2many'):
+                plain[field] = value
+                continue
+            ids = []
+            for command in value or []:
+                if isinstance(command, int):
+                    ids.append(command)
+                elif command[0] == 0:
+                    children.append((kind, command[2]))
+                elif command[0] == 4:
+                    ids.append(command[1])
+                elif command[0] == 6:
+                    ids = list(command[2])
+            plain[field] = ids
+        return plain, children
+
+    def create(self, model, values):
+        if isinstance(values, list):
+            return [self.create(model, vals) for vals in values]
+        plain, children = self.normalize(model, values)
+        handler = getattr(self, 'prepare_' + model.replace('.', '_'), None)
+        if handler:
+            plain = handler(plain)
+        record_id = self.insert(model, plain)
+        for kind, child_values in children:
+            comodel, inverse = kind[1], kind[2]
+            child_id = self.create(comodel, dict(child_values, **{inverse: record_id}))
+            field = next(f for f, k in SCHEMA[model].items() if k == kind)
+            self.tables[model][record_id][field].append(child_id)
+        if model == 'sale.order':
+            self.compute_amount(record_id)
+        return record_id
+
+    def write(self, model, ids, values):
+        plain, children = self.normalize(model, values)
+        if children:
+            raise OdooError("Comandos (0, 0, vals) no soportados en write")
+        for record in self.browse(model, ids):
+            record.update(plain)
+            record['write_date'] = now_string()
+        return True
+
+    def unlink(self, model, ids):
+        for record in self.browse(model, ids):
+            del self.tables[model][record['id']]
+        return True
+
+    def fields_get(self, model, allfields=None, attributes=None):
+        schema = dict(COMMON_FIELDS, **SCHEMA[model])
+        result = {}
+        for field, kind in schema.items():
+            info = {'type': kind[0], 'string': field.replace('_', ' ').title(),
+                    'required': field == 'name', 'readonly': field in COMMON_FIELDS}
+            if len(kind) > 1:
+                info['relation'] = kind[1]
+            result[field] = {k: v for k, v in info.items() if not attributes or k in attributes}
+        return result
+
+    # --- Lógica de negocio ---
+
+    def prepare_sale_order(self, values):
+        self.next_ids['sale.order.name'] += 1
+        values.setdefault('name', f"S{self.next_ids['sale.order.name']:05d}")
+        values.setdefault('state', 'draft')
+        values.setdefault('invoice_status', 'no')
+        values.setdefault('date_order', now_string())
+        return values
+
+    def prepare_account_move(self, values):
+        self.next_ids['account.move.name'] += 1
+        values.setdefault('name', f"INV/{datetime.now().year}/{self.next_ids['account.move.name']:05d}")
+        values.setdefault('state', 'posted')
+        values.setdefault('move_type', 'out_invoice')
+        return values
+
+    def compute_amount(self, order_id):
+        order = self.tables['sale.order'][order_id]
+        lines = self.browse('sale.order.line', order['order_line'])
+        order['amount_total'] = round(sum(l['product_uom_qty'] * l['price_unit'] for l in lines), 2)
+
+    def sale_order_action_confirm(self, ids, **kwargs):
+        for order in self.browse('sale.order', ids):
+            if order['state'] not in ('draft', 'sent'):
+                raise OdooError(f"La orden {order['name']} no está en borrador")
+            order['state'] = 'sale'
+            order['invoice_status'] = 'to invoice'
+            order['write_date'] = now_string()
+            order_type = self.tables['sale.order.type'].get(order['type_id'])
+            if order_type and order_type['auto_invoice']:
+                self.invoice_orders([order['id']])
+        return True
+
+    def invoice_orders(self, order_ids):
+        """Crear las facturas de las órdenes (invoices_per_order por orden)"""
+        created = []
+        for order in self.browse('sale.order', order_ids):
+            if order['state'] != 'sale' or order['invoice_status'] == 'invoiced':
+                continue
+            share = round(order['amount_total'] / self.invoices_per_order, 2)
+            for _ in range(self.invoices_per_order):
+                invoice_id = self.create('account.move', {
+                    'partner_id': order['partner_id'], 'amount_total': share,
+                    'invoice_origin': order['name'],
+                })
+                order['invoice_ids'].append(invoice_id)
+                created.append(invoice_id)
+            order['invoice_status'] = 'invoiced'
+            order['write_date'] = now_string()
+        return created
+
+    def account_move_action_send_and_print(self, ids, **kwargs):
+        self.browse('account.move', ids)
+        return {'type': 'ir.actions.act_window', 'res_model': 'account.move.send', 'target': 'new',
+                'context': {'active_ids': ids, 'default_mail_template_id': 1}}
+
+    def account_move_send_action_send_and_print(self, ids, **kwargs):
+        for wizard in self.browse('account.move.send', ids):
+            for invoice in self.browse('account.move', wizard['move_ids']):
+                self.schedule_pdf(invoice, self.pdf_delay)
+        return {'type': 'ir.actions.act_window_close'}
+
+    def account_move_send_action_download(self, ids, **kwargs):
+        return self.account_move_send_action_send_and_print(ids)
+
+    def schedule_pdf(self, invoice, delay):
+        """Programar el adjunto PDF de una factura (y su mensaje) para dentro de `delay` segundos"""
+        content = make_pdf(invoice['id'], self.pdf_size)
+        available_at = time.time() + delay
+        name = f"{invoice['name'].replace('/', '_')}.pdf"
+        attachment_id = self.insert('ir.attachment', {
+            'name': name, 'mimetype': PDF_MIMETYPE,
+            'checksum': hashlib.sha1(content).hexdigest(), 'file_size': len(content),
+            'res_model': 'account.move', 'res_id': invoice['id'],
+            'datas': base64.b64encode(content).decode('ascii'),
+            'available_at': available_at,
+        })
+        self.insert('mail.message', {
+            'model': 'account.move', 'res_id': invoice['id'], 'date': now_string(),
+            'attachment_ids': [attachment_id], 'available_at': available_at,
+        })
+        return attachment_id
+
+    def sale_advance_payment_inv_create(self, values, context=None, **kwargs):
+        # El wizard toma las órdenes del contexto (active_ids), como en Odoo
+        values = dict(values)
+        if context and context.get('active_model') == 'sale.order':
+            values.setdefault('sale_order_ids', [(6, 0, context.get('active_ids') or [])])
+        return self.create('sale.advance.payment.inv', values)
+
+    def sale_advance_payment_inv_create_invoices(self, ids, **kwargs):
+        for wizard in self.browse('sale.advance.payment.inv', ids):
+            self.invoice_orders(wizard['sale_order_ids'])
+        return {'type': 'ir.actions.act_window', 'res_model': 'account.move'}
+
+    def ir_actions_report_render_qweb_pdf(self, ids, res_ids=None, **kwargs):
+        return [xmlrpc.client.Binary(self.render_pdf(res_ids or [])), 'pdf']
+
+    def render_pdf(self, invoice_ids):
+        invoices = self.browse('account.move', invoice_ids)
+        return b''.join(make_pdf(invoice['id'], self.pdf_size) for invoice in invoices)
+
+    # --- Despacho ---
+
+    def authenticate(self, db, login, password, user_agent_env=None):
+        return self.uid if (db, login, password) == (self.db, self.login, self.password) else False
+
+    def version(self):
+        return {'server_version': '17.0', 'server_version_info': [17, 0, 0, 'final', 0, ''],
+                'protocol_version': 1}
+
+    def execute_kw(self, db, uid, password, model, method, args=(), kwargs=None):
+        if (db, uid, password) != (self.db, self.uid, self.password):
+            raise OdooError("Access Denied", code=3)
+        kwargs = dict(kwargs or {})
+        args = list(args)
+        self.stats[f"{model}.{method}"] += 1
+
+        with self.lock:
+            self.table(model)
+            special = getattr(self, f"{model.replace('.', '_')}_{method}", None)
+            if special is not None:
+                return special(*args, **kwargs)
+            if method == 'search':
+                return self.search(model, *args, **kwargs)
+            if method == 'search_count':
+                return len(self.search(model, *args, context=kwargs.get('context')))
+            if method == 'search_read':
+                domain = args[0] if args else kwargs.pop('domain', [])
+                fields = args[1] if len(args) > 1 else kwargs.pop('fields', None)
+                ids = self.search(model, domain, **kwargs)
+                return self.read(model, ids, fields)
+            if method == 'read':
+                return self.read(model, *args, **{k: v for k, v in kwargs.items() if k == 'fields'})
+            if method == 'create':
+                return self.create(model, *args)
+            if method == 'write':
+                return self.write(model, *args)
+            if method == 'unlink':
+                return self.unlink(model, *args)
+            if method == 'fields_get':
+                return self.fields_get(model, *args, attributes=kwargs.get('attributes'))
+        raise OdooError(f"The method '{method}' does not exist on the model '{model}'")
+
+    def dispatch(self, service, method, params):
+        """Ejecutar una llamada de los servicios common u object"""
+        if self.latency:
+            time.sleep(self.latency)
+        self.stats['rpc_calls'] += 1
+        if service == 'common' and method in ('authenticate', 'login', 'version'):
+            if method == 'version':
+                return self.version()
+            return self.authenticate(*params[:3])
+        if service == 'object' and method == 'execute_kw':
+            return self.execute_kw(*params)
+        raise OdooError(f"Servicio no soportado: {service}.{method}")
+
+    # --- Rutas web ---
+
+    def web_authenticate(self, params):
+        if not self.authenticate(params.get('db'), params.get('login'), params.get('password')):
+            raise OdooError("Access Denied", code=3)
+        session_id = secrets.token_hex(20)
+        with self.lock:
+            self.sessions.add(session_id)
+        return session_id, {'uid': self.uid, 'db': self.db, 'username': self.login}
+
+    def report_pdf(self, session_id, report_name, ids):
+        if session_id not in self.sessions:
+            return None
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.stats['report_renders'] += 1
+            return self.render_pdf(ids)
+
+
+class FakeOdooHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    gzip_threshold = 1024
+    # Cabeceras y cuerpo van en escrituras separadas: sin esto Nagle + ACK diferido suman ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def odoo(self):
+        return self.server.odoo
+
+    def read_body(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        # Como Odoo, el cuerpo se parsea tal cual llega salvo que se simule un proxy que descomprima
+        if self.server.gunzip_requests and self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def reply(self, status, body, content_type, extra_headers=None):
+        headers = dict(extra_headers or {})
+        if 'gzip' in self.headers.get('Accept-Encoding', '') and len(body) > self.gzip_threshold:
+            body = gzip.compress(body, 1)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.odoo.stats['http_requests'] += 1
+        path = self.path.split('?')[0]
+        body = self.read_body()
+        if path.startswith(('/xmlrpc/2/', '/jsonrpc')) and random.random() < self.odoo.error_rate:
+            # Workers saturados: el proxy rechaza la petición sin que llegue a Odoo
+            self.odoo.stats['injected_errors'] += 1
+            return self.reply(503, b'Service Unavailable', 'text/plain', {'Retry-After': '0'})
+        if path.startswith('/xmlrpc/2/'):
+            return self.handle_xmlrpc(path.rsplit('/', 1)[1], body)
+        if path == '/jsonrpc':
+            return self.handle_jsonrpc(body)
+        if path == '/web/session/authenticate':
+            return self.handle_web_authenticate(body)
+        self.reply(404, b'Not Found', 'text/plain')
+
+    def do_GET(self):
+        self.odoo.stats['http_requests'] += 1
+        match = re.fullmatch(r'/report/pdf/([\w.]+)/([\d,]+)', self.path.split('?')[0])
+        if not match:
+            return self.reply(404, b'Not Found', 'text/plain')
+        cookie = re.search(r'session_id=([0-9a-f]+)', self.headers.get('Cookie', ''))
+        ids = [int(i) for i in match.group(2).split(',')]
+        try:
+            content = self.odoo.report_pdf(cookie and cookie.group(1), match.group(1), ids)
+        except OdooError as e:
+            return self.reply(500, str(e).encode('utf-8'), 'text/plain')
+        if content is None:
+            # Sin sesión válida Odoo redirige al login
+            return self.reply(303, b'', 'text/html', {'Location': '/web/login'})
+        self.reply(200, content, PDF_MIMETYPE)
+
+    def handle_xmlrpc(self, service, body):
+        try:
+            params, method = xmlrpc.client.loads(body, use_builtin_types=True)
+            result = self.odoo.dispatch(service, method, params)
+            response = xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True)
+        except OdooError as e:
+            response = xmlrpc.client.dumps(xmlrpc.client.Fault(e.code, str(e)), methodresponse=True)
+        except Exception as e:
+            response = xmlrpc.client.dumps(xmlrpc.client.Fault(1, f"{type(e).__name__}: {e}"),
+                                           methodresponse=True)
+        self.reply(200, response.encode('utf-8'), 'text/xml')
+
+    def handle_jsonrpc(self, body):
+        request = json.loads(body)
+        params = request.get('params', {})
+        try:
+            result = self.odoo.dispatch(params.get('service'), params.get('method'), params.get('args', []))
+            if isinstance(result, list) and result and isinstance(result[0], xmlrpc.client.Binary):
+                result[0] = base64.b64encode(result[0].data).decode('ascii')
+            response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+        except Exception as e:
+            code = e.code if isinstance(e, OdooError) else 200
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': code, 'message': "Odoo Server Error",
+                                  'data': {'name': type(e).__name__, 'message': str(e)}}}
+        self.reply(200, json.dumps(response).encode('utf-8'), 'application/json')
+
+    def handle_web_authenticate(self, body):
+        request = json.loads(body or b'{}')
+        try:
+            session_id, result = self.odoo.web_authenticate(request.get('params', {}))
+        except OdooError as e:
+            response = {'jsonrpc': '2.0', 'id': request.get('id'),
+                        'error': {'code': 200, 'message': "Odoo Session Invalid",
+                                  'data': {'message': str(e)}}}
+            return self.reply(200, json.dumps(response).encode('utf-8'), 'application/json')
+        response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+        self.reply(200, json.dumps(response).encode('utf-8'), 'application/json',
+                   {'Set-Cookie': f"session_id={session_id}; Path=/; HttpOnly"})
+
+
+class FakeOdooServer(ThreadingHTTPServer):
+    """Servidor HTTP/1.1 (keep-alive) que atiende a un FakeOdoo"""
+
+    daemon_threads = True
+
+    def __init__(self, odoo, host='127.0.0.1', port=0, verbose=False, gunzip_requests=False):
+        self.odoo = odoo
+        self.verbose = verbose
+        self.gunzip_requests = gunzip_requests
+        super().__init__((host, port), FakeOdooHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Atender peticiones en un hilo de fondo"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8069)
+    parser.add_argument('--db', default='fake')
+    parser.add_argument('--login', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--partners', type=int, default=50)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=0, help="latencia añadida por petición")
+    parser.add_argument('--pdf-kb', type=int, default=64, help="tamaño de cada PDF generado")
+    parser.add_argument('--pdf-delay', type=float, default=1.0,
+                        help="segundos hasta que aparece el adjunto generado")
+    parser.add_argument('--invoices-per-order', type=int, default=1)
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help="proporción de peticiones RPC respondidas con 503")
+    parser.add_argument('--gunzip-requests', action='store_true',
+                        help="descomprimir peticiones gzip, como un proxy delante de Odoo (Odoo no lo hace)")
+    parser.add_argument('--verbose', action='store_true', help="registrar cada petición HTTP")
+    args = parser.parse_args()
+
+    odoo = FakeOdoo(args.db, args.login, args.password, partners=args.partners, products=args.products,
+                    latency=args.latency_ms / 1000, pdf_size=args.pdf_kb * 1024,
+                    pdf_delay=args.pdf_delay, invoices_per_order=args.invoices_per_order,
+                    error_rate=args.error_rate)
+    server = FakeOdooServer(odoo, args.host, args.port, verbose=args.verbose,
+                            gunzip_requests=args.gunzip_requests)
+    print(f"🟢 Odoo simulado en {server.url} (db={args.db}, usuario={args.login})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"🔴 Detenido. Llamadas atendidas: {odoo.stats['rpc_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Conector asyncio para Odoo con concurrencia acotada
+
+Permite lanzar miles de operaciones (búsquedas, creación y confirmación de
+órdenes, descarga de PDFs) desde un solo proceso sin un hilo por petición.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from odoo_config import env_int
+from odoo_console import OdooConnector
+
+
+class AsyncOdooConnector:
+    """Contraparte asyncio de OdooConnector
+
+    Las llamadas XML-RPC se ejecutan en un pool fijo de `concurrency` hilos y
+    un semáforo limita cuántas hay en vuelo. Cada hilo usa su propio clon del
+    conector (con su propio transporte HTTP), ya que ServerProxy no es seguro
+    entre hilos.
+
+    Uso:
+        async with AsyncOdooConnector(concurrency=8) as odoo:
+            results = await odoo.gather(odoo.confirm_sale_order(i) for i in order_ids)
+    """
+
+    def __init__(self, connector=None, concurrency=None):
+        self.connector = connector or OdooConnector()
+        self.concurrency = concurrency or env_int('ODOO_ASYNC_CONCURRENCY', 8)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix='odoo-worker')
+        self._semaphore = None  # se crea dentro del bucle de eventos
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._workers = []
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ConnectionError("No se pudo conectar con Odoo")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self):
+        """Autenticar una sola vez; los workers reutilizan el uid"""
+        if self.connector.uid:
+            return True
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.connector.connect)
+
+    def _worker_connector(self):
+        """Conector propio del hilo actual (se crea la primera vez)"""
+        connector = getattr(self._local, 'connector', None)
+        if connector is None:
+            connector = self.connector.clone()
+            self._local.connector = connector
+            with self._lock:
+                self._workers.append(connector)
+        return connector
+
+    def _call(self, name, args, kwargs):
+        return getattr(self._worker_connector(), name)(*args, **kwargs)
+
+    async def call(self, name, *args, **kwargs):
+        """Ejecutar un método de OdooConnector en un worker, respetando el límite"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await loop.run_in_executor(self._executor, self._call, name, args, kwargs)
+
+    async def gather(self, coroutines):
+        """Esperar varias operaciones; los errores se devuelven en su posición"""
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    # --- Misma superficie que OdooConnector ---
+
+    async def execute(self, model, method, *args, **kwargs):
+        return await self.call('execute', model, method, *args, **kwargs)
+
+    async def search(self, model, domain, **kwargs):
+        return await self.execute(model, 'search', domain, **kwargs)
+
+    async def read(self, model, ids, fields=None):
+        return await self.execute(model, 'read', ids, fields or [])
+
+    async def search_read(self, model, domain, fields=None, **kwargs):
+        return await self.execute(model, 'search_read', domain, fields or [], **kwargs)
+
+    async def create(self, model, vals):
+        return await self.execute(model, 'create', vals)
+
+    async def read_records(self, model, ids, fields):
+        return await self.call('read_records', model, ids, fields)
+
+    async def create_sale_order_with_type(self, order_data, order_type_id=None):
+        return await self.call('create_sale_order_with_type', order_data, order_type_id)
+
+    async def import_sale_orders(self, path, fmt=None, chunk_size=None, order_type_id=None):
+        return await self.call('import_sale_orders', path, fmt, chunk_size, order_type_id)
+
+    async def run_batch(self, path, fmt=None, chunk_size=None, order_type_id=None, download=True, max_wait=30,
+                        journal_path=None):
+        return await self.call('run_batch', path, fmt, chunk_size, order_type_id, download, max_wait, journal_path)
+
+    async def confirm_sale_order(self, order_id):
+        return await self.call('confirm_sale_order', order_id)
+
+    async def confirm_sale_orders(self, order_ids, chunk_size=None):
+        return await self.call('confirm_sale_orders', order_ids, chunk_size)
+
+    async def invoice_sale_orders(self, order_ids, chunk_size=None):
+        return await self.call('invoice_sale_orders', order_ids, chunk_size)
+
+    async def get_order_info(self, order_id):
+        return await self.call('get_order_info', order_id)
+
+    async def download_invoice_pdf(self, invoice_id, filename=None, invoice=None):
+        return await self.call('download_invoice_pdf', invoice_id, filename, invoice)
+
+    # Un solo worker de descarga por defecto: el paralelismo ya lo da `concurrency`
+    # y un pool por llamada multiplicaría las llamadas simultáneas y los clones
+    async def download_order_invoices(self, order_id, max_wait=30, workers=1):
+        return await self.call('download_order_invoices', order_id, max_wait, workers)
+
+    async def download_invoices(self, order_ids, max_wait=30, workers=1):
+        return await self.call('download_invoices', order_ids, max_wait, workers)
+
+    async def render_invoice_pdfs(self, invoice_ids, report_name=None):
+        return await self.call('render_invoice_pdfs', invoice_ids, report_name)
+
+    # --- Estadísticas y cierre ---
+
+    def stats(self):
+        """Estadísticas sumadas del conector principal y de todos los workers"""
+        total = Counter(self.connector.stats)
+        transport = Counter(self.connector.transport.summary())
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            total.update(worker.stats)
+            transport.update(worker.transport.summary())
+        # La política de reintentos es compartida: se suma una sola vez
+        transport.update(self.connector.retry_policy.summary())
+        return {'connector': dict(total), 'transport': dict(transport), 'workers': len(workers)}
+
+    async def close(self):
+        """Cerrar las conexiones de todos los workers y el pool de hilos"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+        self._executor.shutdown(wait=True)
+        self.connector.close()
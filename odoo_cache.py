@@ -0,0 +1,553 @@
+# -*- coding: utf-8 -*-
+"""
+Cachés locales en disco para evitar viajes repetidos a Odoo
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from odoo_config import env_str
+
+
+def cache_dir():
+    """Directorio de cachés locales (ODOO_CACHE_DIR, por defecto .odoo_cache)"""
+    path = env_str('ODOO_CACHE_DIR', '.odoo_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def server_key(url, db):
+    """Clave que identifica un servidor y base de datos de Odoo"""
+    return f"{url}|{db}"
+
+
+def write_json_atomic(path, data):
+    """Escribir un JSON de forma atómica (archivo temporal + rename)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class MetadataCache:
+    """Caché persistente de metadatos de modelos (resultado de fields_get)
+
+    Las entradas se guardan por URL, base de datos y modelo, caducan tras
+    `ttl` segundos y se invalidan todas las de un servidor cuando cambia la
+    huella de versiones de los módulos instalados.
+    """
+
+    def __init__(self, path, ttl=86400, check_interval=3600):
+        self.path = path
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.data = {'servers': {}, 'models': {}}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.data['servers'] = data.get('servers', {})
+            self.data['models'] = data.get('models', {})
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Caché de metadatos ilegible, se reconstruirá: {e}")
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self.data)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de metadatos: {e}")
+
+    def model_key(self, url, db, model):
+        return f"{server_key(url, db)}|{model}"
+
+    def get(self, url, db, model, attributes):
+        """Devolver los campos cacheados si son vigentes y tienen los atributos pedidos"""
+        entry = self.data['models'].get(self.model_key(url, db, model))
+        if not entry:
+            return None
+        if time.time() - entry['fetched_at'] > self.ttl:
+            return None
+        if not set(attributes) <= set(entry['attributes']):
+            return None
+        return entry['fields']
+
+    def set(self, url, db, model, attributes, fields):
+        self.data['models'][self.model_key(url, db, model)] = {
+            'fetched_at': time.time(),
+            'attributes': sorted(attributes),
+            'fields': fields,
+        }
+        self._save()
+
+    def needs_module_check(self, url, db):
+        """Indicar si toca volver a comprobar las versiones de los módulos"""
+        server = self.data['servers'].get(server_key(url, db))
+        return not server or time.time() - server['checked_at'] > self.check_interval
+
+    def update_module_fingerprint(self, url, db, modules):
+        """Registrar la huella de módulos instalados; si cambió, invalidar el servidor
+
+        Devuelve True si se invalidaron entradas.
+        """
+        versions = sorted(f"{m['name']}={m.get('latest_version') or ''}" for m in modules)
+        fingerprint = hashlib.sha1('\n'.join(versions).encode('utf-8')).hexdigest()
+
+        key = server_key(url, db)
+        previous = self.data['servers'].get(key, {}).get('fingerprint')
+        invalidated = previous is not None and previous != fingerprint
+        if invalidated:
+            self.invalidate(url, db)
+
+        self.data['servers'][key] = {'fingerprint': fingerprint, 'checked_at': time.time()}
+        self._save()
+        return invalidated
+
+    def invalidate(self, url, db):
+        """Eliminar todas las entradas de modelos de un servidor"""
+        prefix = server_key(url, db) + '|'
+        for key in [k for k in self.data['models'] if k.startswith(prefix)]:
+            del self.data['models'][key]
+
+
+class SessionCache:
+    """Caché de autenticación (uid y versión del servidor) entre ejecuciones
+
+    Permite que invocaciones cortas desde la línea de comandos no repitan
+    `authenticate` en cada ejecución. La clave incluye un hash de la
+    contraseña, de modo que cambiarla invalida la entrada.
+    """
+
+    def __init__(self, path, ttl=43200):
+        self.path = path
+        self.ttl = ttl
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(url, db, username, password):
+        digest = hashlib.sha256(f"{url}|{db}|{username}|{password}".encode('utf-8')).hexdigest()
+        return f"{server_key(url, db)}|{username}|{digest[:16]}"
+
+    def get(self, key):
+        """Devolver la sesión cacheada si sigue vigente"""
+        entry = self.entries.get(key)
+        if not entry or time.time() - entry['authenticated_at'] > self.ttl:
+            return None
+        return entry
+
+    def set(self, key, uid, version):
+        self.entries[key] = {'uid': uid, 'version': version, 'authenticated_at': time.time()}
+        self._save()
+
+    def invalidate(self, key):
+        if self.entries.pop(key, None) is not None:
+            self._save()
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self.entries)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la caché de sesión: {e}")
+
+
+class AttachmentIndex:
+    """Índice local (SQLite) de qué adjunto contiene el PDF de cada factura
+
+    Guarda el ID del adjunto, su checksum y cómo se encontró, para que la
+    siguiente descarga vaya directo al adjunto conocido en vez de repetir
+    toda la cascada de búsqueda.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS invoice_attachments (
+                server TEXT NOT NULL,
+                invoice_id INTEGER NOT NULL,
+                attachment_id INTEGER NOT NULL,
+                checksum TEXT,
+                source TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (server, invoice_id)
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, server, invoice_ids):
+        """Devolver las entradas conocidas de varias facturas, por ID de factura"""
+        invoice_ids = list(invoice_ids)
+        if not invoice_ids:
+            return {}
+        placeholders = ','.join('?' * len(invoice_ids))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT invoice_id, attachment_id, checksum, source, updated_at "
+                f"FROM invoice_attachments WHERE server = ? AND invoice_id IN ({placeholders})",
+                [server] + invoice_ids).fetchall()
+        return {
+            row[0]: {'attachment_id': row[1], 'checksum': row[2], 'source': row[3], 'updated_at': row[4]}
+            for row in rows
+        }
+
+    def put(self, server, invoice_id, attachment, source):
+        """Registrar el adjunto PDF de una factura"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO invoice_attachments "
+                "(server, invoice_id, attachment_id, checksum, source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (server, invoice_id, attachment['id'], attachment.get('checksum'), source, time.time()))
+            self.conn.commit()
+
+    def forget(self, server, invoice_id):
+        """Eliminar la entrada de una factura (adjunto borrado o modificado)"""
+        with self._lock:
+            self.conn.execute("DELETE FROM invoice_attachments WHERE server = ? AND invoice_id = ?",
+                              (server, invoice_id))
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class RunJournal:
+    """Diario local (SQLite) de los pasos hechos por cada orden de una carga por lotes
+
+    La clave es la referencia de la orden (`order_ref`, guardada en Odoo
+    como client_order_ref) y el paso es el último completado: 'created',
+    'confirmed' o 'downloaded'. Una carga interrumpida se retoma saltando lo
+    que ya está hecho.
+    """
+
+    STEPS = ('created', 'confirmed', 'downloaded')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_journal (
+                server TEXT NOT NULL,
+                order_ref TEXT NOT NULL,
+                step TEXT NOT NULL,
+                order_id INTEGER,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (server, order_ref)
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, server, order_refs):
+        """Entradas conocidas de varias órdenes, por order_ref"""
+        order_refs = list(order_refs)
+        if not order_refs:
+            return {}
+        placeholders = ','.join('?' * len(order_refs))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT order_ref, step, order_id, error, updated_at FROM run_journal "
+                f"WHERE server = ? AND order_ref IN ({placeholders})", [server] + order_refs).fetchall()
+        return {row[0]: {'step': row[1], 'order_id': row[2], 'error': row[3], 'updated_at': row[4]}
+                for row in rows}
+
+    def mark_many(self, server, step, entries):
+        """Registrar `step` como completado para varias órdenes: [(order_ref, order_id), ...]"""
+        entries = list(entries)
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO run_journal (server, order_ref, step, order_id, error, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                [(server, order_ref, step, order_id, now) for order_ref, order_id in entries])
+            self.conn.commit()
+
+    def note_error(self, server, order_ref, error):
+        """Anotar el último error de una orden sin cambiar su paso"""
+        with self._lock:
+            self.conn.execute("UPDATE run_journal SET error = ?, updated_at = ? "
+                              "WHERE server = ? AND order_ref = ?", (error, time.time(), server, order_ref))
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class RecordMirror:
+    """Réplica local (SQLite) de modelos pequeños y muy consultados
+
+    Guarda clientes y productos con su `write_date` para sincronizar de forma
+    incremental, el flag `active` para descartar archivados y un índice de
+    texto completo (FTS5, o LIKE si SQLite no lo trae) sobre nombre, email y
+    referencia interna.
+    """
+
+    SEARCH_COLUMNS = ('name', 'email', 'default_code')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS mirror_records (
+                id INTEGER PRIMARY KEY,
+                server TEXT NOT NULL,
+                model TEXT NOT NULL,
+                record_id INTEGER NOT NULL,
+                name TEXT,
+                email TEXT,
+                default_code TEXT,
+                active INTEGER NOT NULL DEFAULT 1,
+                write_date TEXT,
+                data TEXT NOT NULL,
+                UNIQUE (server, model, record_id)
+            );
+            CREATE TABLE IF NOT EXISTS mirror_state (
+                server TEXT NOT NULL,
+                model TEXT NOT NULL,
+                high_water TEXT,
+                synced_at REAL,
+                reconciled_at REAL,
+                PRIMARY KEY (server, model)
+            );
+        """)
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS mirror_fts "
+                              "USING fts5(name, email, default_code, tokenize='unicode61 remove_diacritics 2')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite compilado sin FTS5: se busca con LIKE
+            self.fts = False
+        self.conn.commit()
+
+    def state(self, server, model):
+        """Marca de agua y fechas de la última sincronización ({} si nunca se sincronizó)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT high_water, synced_at, reconciled_at FROM mirror_state "
+                "WHERE server = ? AND model = ?", (server, model)).fetchone()
+        return {'high_water': row[0], 'synced_at': row[1], 'reconciled_at': row[2]} if row else {}
+
+    def upsert_many(self, server, model, records, high_water=None, reconciled=False, complete=True):
+        """Guardar registros sincronizados y avanzar la marca de agua en una transacción
+
+        Las páginas intermedias van con complete=False: guardan los registros
+        sin tocar mirror_state, así una sincronización interrumpida no deja
+        la réplica como recién sincronizada.
+        """
+        with self._lock, self.conn:
+            for record in records:
+                values = [record.get(column) or None for column in self.SEARCH_COLUMNS]
+                self.conn.execute(
+                    "INSERT INTO mirror_records "
+                    "(server, model, record_id, name, email, default_code, active, write_date, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (server, model, record_id) DO UPDATE SET "
+                    "name = excluded.name, email = excluded.email, default_code = excluded.default_code, "
+                    "active = excluded.active, write_date = excluded.write_date, data = excluded.data",
+                    [server, model, record['id']] + values +
+                    [int(record.get('active', True)), record.get('write_date'), json.dumps(record)])
+                rowid = self.conn.execute(
+                    "SELECT id FROM mirror_records WHERE server = ? AND model = ? AND record_id = ?",
+                    (server, model, record['id'])).fetchone()[0]
+                if self.fts:
+                    self.conn.execute("DELETE FROM mirror_fts WHERE rowid = ?", (rowid,))
+                    self.conn.execute("INSERT INTO mirror_fts (rowid, name, email, default_code) "
+                                      "VALUES (?, ?, ?, ?)", [rowid] + values)
+            if not complete:
+                return
+            now = time.time()
+            self.conn.execute(
+                "INSERT INTO mirror_state (server, model, high_water, synced_at, reconciled_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (server, model) DO UPDATE SET high_water = excluded.high_water, "
+                "synced_at = excluded.synced_at, "
+                "reconciled_at = COALESCE(excluded.reconciled_at, mirror_state.reconciled_at)",
+                (server, model, high_water, now, now if reconciled else None))
+
+    def record_ids(self, server, model):
+        """IDs de todos los registros replicados de un modelo"""
+        with self._lock:
+            rows = self.conn.execute("SELECT record_id FROM mirror_records WHERE server = ? AND model = ?",
+                                     (server, model)).fetchall()
+        return {row[0] for row in rows}
+
+    def delete_many(self, server, model, record_ids):
+        """Eliminar registros que ya no existen en el servidor"""
+        record_ids = list(record_ids)
+        if not record_ids:
+            return
+        placeholders = ','.join('?' * len(record_ids))
+        with self._lock, self.conn:
+            rowids = [row[0] for row in self.conn.execute(
+                f"SELECT id FROM mirror_records WHERE server = ? AND model = ? "
+                f"AND record_id IN ({placeholders})", [server, model] + record_ids)]
+            self.conn.executemany("DELETE FROM mirror_records WHERE id = ?", [(r,) for r in rowids])
+            if self.fts:
+                self.conn.executemany("DELETE FROM mirror_fts WHERE rowid = ?", [(r,) for r in rowids])
+
+    def get_many(self, server, model, record_ids):
+        """Registros replicados por ID (incluidos los archivados, con su `active`)"""
+        record_ids = list(record_ids)
+        if not record_ids:
+            return {}
+        placeholders = ','.join('?' * len(record_ids))
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT record_id, data FROM mirror_records WHERE server = ? AND model = ? "
+                f"AND record_id IN ({placeholders})", [server, model] + record_ids).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def search(self, server, model, query=None, limit=10, include_inactive=False):
+        """Buscar por nombre, email o referencia; sin texto lista por ID"""
+        where = "r.server = ? AND r.model = ?" + ("" if include_inactive else " AND r.active = 1")
+        params = [server, model]
+        terms = (query or '').split()
+
+        if terms and self.fts:
+            # Cada término como prefijo entre comillas: "acme"* "sa"*
+            match = ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+            sql = (f"SELECT r.data FROM mirror_fts f JOIN mirror_records r ON r.id = f.rowid "
+                   f"WHERE mirror_fts MATCH ? AND {where} ORDER BY bm25(mirror_fts), r.record_id LIMIT ?")
+            params = [match] + params
+        else:
+            sql = f"SELECT r.data FROM mirror_records r WHERE {where}"
+            for term in terms:
+                sql += " AND (" + " OR ".join(f"r.{c} LIKE ?" for c in self.SEARCH_COLUMNS) + ")"
+                params += [f"%{term}%"] * len(self.SEARCH_COLUMNS)
+            sql += " ORDER BY r.record_id LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(sql, params + [limit]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def forget(self, server, model):
+        """Vaciar la réplica de un modelo (la próxima sincronización será completa)"""
+        with self._lock, self.conn:
+            if self.fts:
+                self.conn.execute("DELETE FROM mirror_fts WHERE rowid IN (SELECT id FROM mirror_records "
+                                  "WHERE server = ? AND model = ?)", (server, model))
+            self.conn.execute("DELETE FROM mirror_records WHERE server = ? AND model = ?", (server, model))
+            self.conn.execute("DELETE FROM mirror_state WHERE server = ? AND model = ?", (server, model))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class PdfStore:
+    """Almacén local de PDFs direccionado por contenido (checksum SHA-1 de ir.attachment)
+
+    Cada PDF se guarda una sola vez en `<raíz>/<ab>/<checksum>.pdf`. Los
+    nombres legibles en el directorio de trabajo son enlaces duros (o
+    simbólicos, o copias si el sistema de archivos no admite enlaces) a esa
+    copia, así que repetir una descarga no transfiere ni reescribe nada.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, checksum):
+        return os.path.join(self.root, checksum[:2], f"{checksum}.pdf")
+
+    def has(self, checksum, size=None):
+        """¿Está ya el PDF en el almacén? (con `size` se descartan copias truncadas)"""
+        try:
+            stored_size = os.path.getsize(self.path_for(checksum))
+        except OSError:
+            return False
+        return not size or stored_size == size
+
+    def put(self, checksum, content):
+        """Guardar un PDF de forma atómica; devuelve el checksum real del contenido"""
+        def write(f):
+            f.write(content)
+            return hashlib.sha1(content).hexdigest()
+        return self.put_stream(checksum, write)
+
+    def put_stream(self, checksum, write):
+        """Como put, pero el contenido lo vuelca `write(f)` en un temporal
+
+        `write` recibe el archivo abierto y devuelve el checksum de lo escrito;
+        el archivo solo entra al almacén si `write` termina bien.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w+b') as f:
+                actual = write(f)
+            if checksum and actual != checksum:
+                print(f"⚠️ El checksum del adjunto ({checksum[:12]}) no coincide con el contenido ({actual[:12]})")
+            path = self.path_for(actual)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return actual
+
+    def holds(self, filename, checksum):
+        """¿El archivo `filename` ya tiene el contenido de `checksum`?"""
+        try:
+            if os.path.samefile(filename, self.path_for(checksum)):
+                return True
+            if os.path.getsize(filename) != os.path.getsize(self.path_for(checksum)):
+                return False
+            digest = hashlib.sha1()
+            with open(filename, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+            return digest.hexdigest() == checksum
+        except OSError:
+            return False
+
+    def link(self, checksum, filename):
+        """Publicar el PDF con un nombre legible y devolver el nombre usado
+
+        Si `filename` ya existe con otro contenido (dos facturas con el mismo
+        nombre de adjunto) se usa `<nombre>_<checksum[:8]>.pdf`, estable
+        entre ejecuciones.
+        """
+        if os.path.lexists(filename):
+            if self.holds(filename, checksum):
+                return filename
+            base, ext = os.path.splitext(filename)
+            filename = f"{base}_{checksum[:8]}{ext}"
+            if os.path.lexists(filename) and self.holds(filename, checksum):
+                return filename
+
+        source = self.path_for(checksum)
+        tmp_name = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.link(source, tmp_name)
+        except OSError:
+            try:
+                os.symlink(os.path.abspath(source), tmp_name)
+            except OSError:
+                shutil.copyfile(source, tmp_name)
+        os.replace(tmp_name, filename)
+        return filename
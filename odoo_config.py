@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura de opciones de configuración desde variables de entorno (.env)
+"""
+
+import os
+
+TRUE_VALUES = ('1', 'true', 'yes', 'si', 'sí', 'on')
+
+
+def env_str(name, default=None):
+    """Leer una cadena del entorno (vacía = valor por defecto)"""
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip()
+
+
+def env_flag(name, default=False):
+    """Leer un booleano del entorno (1/true/yes/si/on)"""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in TRUE_VALUES
+
+
+def env_int(name, default):
+    """Leer un entero del entorno; si no es válido se usa el valor por defecto"""
+    value = env_str(name)
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        print(f"⚠️ Valor no válido para {name}: {value!r}, usando {default}")
+        return default
+
+
+def env_float(name, default):
+    """Leer un número decimal del entorno; si no es válido se usa el valor por defecto"""
+    value = env_str(name)
+    try:
+        return float(value) if value is not None else default
+    except ValueError:
+        print(f"⚠️ Valor no válido para {name}: {value!r}, usando {default}")
+        return default
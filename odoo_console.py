@@ -8,30 +8,177 @@ Ejemplo básico para crear órdenes de venta y realizar operaciones
 import xmlrpc.client
 import json
 import os
+import sys
 import base64
+import random
 import time
+import argparse
+import contextlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
+from collections import Counter
 from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+from odoo_cache import (AttachmentIndex, MetadataCache, PdfStore, RecordMirror, RunJournal, SessionCache,
+                        cache_dir, server_key)
+from odoo_config import env_flag, env_int, env_str
+from odoo_import import chunked, group_orders, read_rows
+import odoo_daemon
+import odoo_targets
+from odoo_metrics import recorder_from_env
+from odoo_resilience import RetryPolicy, was_rejected
+from odoo_transport import Base64Sink, JsonRpcProxy, PooledTransport, StreamingUnmarshaller
+
+# Momento de carga del script, para medir el tiempo de arranque
+STARTED_AT = time.perf_counter()
+
+# Campos de metadatos de adjuntos: nunca incluyen el contenido (datas)
+ATTACHMENT_META_FIELDS = ['name', 'mimetype', 'checksum', 'file_size', 'create_date']
+
+# Campos replicados localmente por modelo (réplica de clientes y productos)
+MIRROR_FIELDS = {
+    'res.partner': ['name', 'email', 'active', 'write_date'],
+    'product.product': ['name', 'list_price', 'default_code', 'active', 'write_date'],
+}
+
+class InlineExecutor:
+    """Ejecutor sin hilos: cada tarea corre al enviarla, en el hilo que la envía
+
+    Con un solo worker las descargas usan el propio conector, sin pool ni
+    clon: quien llama (p. ej. un worker de AsyncOdooConnector) sigue
+    haciendo una sola llamada RPC a la vez.
+    """
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
 
 class OdooConnector:
-    def __init__(self):
+    def __init__(self, url=None, db=None, username=None, password=None):
         load_dotenv()
-        self.url = os.getenv('ODOO_URL')
-        self.db = os.getenv('ODOO_DB')
-        self.username = os.getenv('ODOO_USERNAME')
-        self.password = os.getenv('ODOO_PASSWORD')
-        
-        # Conexiones XML-RPC
-        self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common')
-        self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object')
+        self.url = url or os.getenv('ODOO_URL')
+        self.db = db or os.getenv('ODOO_DB')
+        self.username = username or os.getenv('ODOO_USERNAME')
+        self.password = password or os.getenv('ODOO_PASSWORD')
+        
+        # Conexiones XML-RPC o JSON-RPC (comparten un pool HTTP keep-alive con gzip)
+        self.transport = PooledTransport.from_env(self.url)
+        self.protocol = env_str('ODOO_PROTOCOL', 'xmlrpc')
+        if self.protocol == 'jsonrpc':
+            self.common = JsonRpcProxy(self.url, 'common', self.transport)
+            self.models = JsonRpcProxy(self.url, 'object', self.transport)
+        else:
+            self.common = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/common',
+                                                    transport=self.transport)
+            self.models = xmlrpc.client.ServerProxy(f'{self.url}/xmlrpc/2/object',
+                                                    transport=self.transport)
         self.uid = None
+        self.server_version = None
+        self.auth_source = None
+        self.stats = Counter()
+        self.session_id = None
+        
+        # Hooks de instrumentación por llamada RPC (ODOO_PROFILE, ODOO_SLOW_RPC_MS, ODOO_RPC_LOG)
+        self.rpc_hooks = []
+        self.phase = None
+        recorder = recorder_from_env()
+        if recorder is not None:
+            self.rpc_hooks.append(recorder)
+        
+        # Reintentos de errores transitorios y circuit breaker ante un Odoo saturado
+        self.retry_policy = RetryPolicy.from_env()
+        
+        # Modo de obtención de PDFs: 'wizard' (Enviar e imprimir + espera de adjuntos)
+        # o 'report' (renderizado directo del informe en una sola petición)
+        self.pdf_mode = env_str('ODOO_PDF_MODE', 'wizard')
+        self.invoice_report = env_str('ODOO_INVOICE_REPORT', 'account.report_invoice')
+        
+        # Caché en disco de metadatos de modelos (fields_get)
+        self.metadata_cache = None
+        if env_flag('ODOO_METADATA_CACHE', True):
+            self.metadata_cache = MetadataCache(
+                os.path.join(cache_dir(), 'metadata.json'),
+                ttl=env_int('ODOO_METADATA_TTL', 86400),
+                check_interval=env_int('ODOO_METADATA_CHECK_INTERVAL', 3600),
+            )
+        
+        # Caché de autenticación entre ejecuciones (usada por la línea de comandos)
+        self.session_cache = None
+        if env_flag('ODOO_SESSION_CACHE', True):
+            self.session_cache = SessionCache(os.path.join(cache_dir(), 'session.json'),
+                                              ttl=env_int('ODOO_SESSION_TTL', 43200))
+        
+        # Índice local factura → adjunto PDF (evita repetir la cascada de búsqueda)
+        self.attachment_index = None
+        if env_flag('ODOO_ATTACHMENT_INDEX', True):
+            self.attachment_index = AttachmentIndex(os.path.join(cache_dir(), 'attachments.sqlite'))
+        
+        # Almacén de PDFs por checksum: una descarga repetida no transfiere el contenido
+        self.pdf_store = None
+        if env_flag('ODOO_PDF_STORE', True):
+            self.pdf_store = PdfStore(env_str('ODOO_PDF_STORE_DIR') or os.path.join(cache_dir(), 'pdfs'))
+        
+        # Adjuntos desde este tamaño se descargan en streaming directo a disco (0 = nunca)
+        self.stream_threshold = env_int('ODOO_STREAM_THRESHOLD', 1024 * 1024)
+        
+        # Espera de PDFs: solo sondeo de ir.attachment. El bus por long polling es de
+        # Odoo <= 15 y el wizard account.move.send de Odoo 17+: ningún servidor tiene ambos
+        pdf_wait = env_str('ODOO_PDF_WAIT', 'poll')
+        if pdf_wait != 'poll':
+            raise ValueError(f"ODOO_PDF_WAIT={pdf_wait} no es válido: los PDFs solo se esperan "
+                             f"consultando los adjuntos ('poll')")
+        
+        # Réplica local de clientes y productos (búsqueda y validación sin ir al servidor)
+        self.mirror = None
+        if env_flag('ODOO_MIRROR', True):
+            self.mirror = RecordMirror(os.path.join(cache_dir(), 'mirror.sqlite'))
+        self.mirror_ttl = env_int('ODOO_MIRROR_TTL', 300)
+        self.mirror_reconcile_interval = env_int('ODOO_MIRROR_RECONCILE_INTERVAL', 86400)
+        self.mirror_overlap = env_int('ODOO_MIRROR_OVERLAP', 300)
+        
+    def session_key(self):
+        return SessionCache.key(self.url, self.db, self.username, self.password)
+    
+    def connect(self, use_cache=False):
+        """Conectar con Odoo
+
+        Con `use_cache` se reutiliza el uid autenticado en una ejecución
+        anterior (si sigue vigente) y se evita el viaje de `authenticate`.
+        """
+        if use_cache and self.session_cache is not None:
+            cached = self.session_cache.get(self.session_key())
+            if cached:
+                self.uid = cached['uid']
+                self.server_version = cached.get('version')
+                self.auth_source = 'cache'
+                print(f"✅ Sesión reutilizada de la caché para {self.username}")
+                return True
         
-    def connect(self):
-        """Conectar con Odoo"""
         try:
-            self.uid = self.common.authenticate(self.db, self.username, self.password, {})
+            self.uid = self.call_rpc('common', 'authenticate', self.common.authenticate,
+                                     self.db, self.username, self.password, {})
             if self.uid:
+                self.auth_source = 'server'
                 print(f"✅ Conectado exitosamente a Odoo como {self.username}")
+                if use_cache and self.session_cache is not None:
+                    try:
+                        self.server_version = self.common.version().get('server_version')
+                    except Exception:
+                        self.server_version = None
+                    self.session_cache.set(self.session_key(), self.uid, self.server_version)
                 return True
             else:
                 print("❌ Error de autenticación")
@@ -40,58 +187,283 @@ class OdooConnector:
             print(f"❌ Error de conexión: {e}")
             return False
     
+    def forget_cached_session(self):
+        """Descartar la autenticación cacheada (p. ej. tras un acceso denegado)"""
+        if self.session_cache is not None:
+            self.session_cache.invalidate(self.session_key())
+    
+    def clone(self):
+        """Crear otro conector con la misma sesión pero conexiones propias
+
+        ServerProxy no es seguro entre hilos: cada worker concurrente debe
+        usar su propio clon. Se reutiliza el uid, sin volver a autenticar.
+        """
+        other = OdooConnector(self.url, self.db, self.username, self.password)
+        other.uid = self.uid
+        other.session_id = self.session_id
+        other.rpc_hooks = list(self.rpc_hooks)
+        other.phase = self.phase
+        # Mismo circuit breaker: todos los workers ven la salud del mismo servidor
+        other.retry_policy = self.retry_policy
+        return other
+    
+    def add_rpc_hook(self, hook):
+        """Registrar una función que recibe un evento (dict) por cada llamada RPC"""
+        self.rpc_hooks.append(hook)
+    
+    @contextlib.contextmanager
+    def rpc_phase(self, name):
+        """Etiquetar las llamadas RPC hechas dentro del bloque con una fase del flujo"""
+        previous, self.phase = self.phase, name
+        try:
+            yield
+        finally:
+            self.phase = previous
+    
+    def call_rpc(self, model, method, func, *args):
+        """Ejecutar una llamada RPC avisando a los hooks de instrumentación"""
+        if not self.rpc_hooks:
+            return func(*args)
+        
+        self.transport.reset_call_bytes()
+        started = time.perf_counter()
+        error = None
+        try:
+            return func(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            sent, received = self.transport.call_bytes()
+            event = {
+                'ts': time.time(),
+                'model': model,
+                'method': method,
+                'phase': self.phase,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+                'request_bytes': sent,
+                'response_bytes': received,
+                'error': error,
+            }
+            for hook in self.rpc_hooks:
+                hook(event)
+    
     def execute(self, model, method, *args, **kwargs):
-        """Ejecutar método en Odoo"""
-        return self.models.execute_kw(
-            self.db, self.uid, self.password,
-            model, method, args, kwargs
-        )
+        """Ejecutar método en Odoo
+
+        Los errores transitorios (Odoo saturado, conexión cortada) se
+        reintentan con backoff: las lecturas siempre, el resto de métodos solo
+        si es seguro que Odoo no aplicó la llamada.
+        """
+        self.stats['rpc_calls'] += 1
+        return self.retry_policy.call(
+            method,
+            lambda: self.call_rpc(model, method, self.models.execute_kw,
+                                  self.db, self.uid, self.password, model, method, args, kwargs),
+            label=f"{model}.{method}")
+    
+    def read_records(self, model, ids, fields):
+        """Leer varios registros en una sola llamada, indexados por ID"""
+        if not ids:
+            return {}
+        records = self.execute(model, 'read', list(ids), fields)
+        return {record['id']: record for record in records}
+    
+    def get_transport_stats(self):
+        """Estadísticas del transporte HTTP (reutilización de conexiones y gzip) y de reintentos"""
+        stats = self.transport.summary()
+        stats.update(self.retry_policy.summary())
+        return stats
+    
+    def close(self):
+        """Cerrar las conexiones HTTP abiertas, el índice local y la réplica"""
+        self.transport.close_all()
+        if self.attachment_index is not None:
+            self.attachment_index.close()
+        if self.mirror is not None:
+            self.mirror.close()
+    
+    def iter_records(self, model, domain=None, fields=None, page_size=200, limit=None, context=None):
+        """Recorrer registros de un modelo por páginas con search_read
+
+        Pagina por cursor de ID (`id > último`) en lugar de offset, de modo que
+        cada página cuesta lo mismo sin importar el tamaño de la tabla y solo
+        hay una página en memoria a la vez.
+        """
+        domain = list(domain or [])
+        last_id = 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_limit = page_size if remaining is None else min(page_size, remaining)
+            kwargs = {'fields': fields or [], 'limit': page_limit, 'order': 'id asc'}
+            if context:
+                kwargs['context'] = context
+            records = self.execute(model, 'search_read',
+                                   domain + [['id', '>', last_id]], **kwargs)
+            for record in records:
+                yield record
+            if len(records) < page_limit:
+                break
+            last_id = records[-1]['id']
+            if remaining is not None:
+                remaining -= len(records)
     
-    def search_customers(self, limit=10):
+    def text_domain(self, query, fields):
+        """Dominio que exige cada palabra de `query` en alguno de los campos (ilike)"""
+        domain = []
+        for term in (query or '').split():
+            domain += ['|'] * (len(fields) - 1) + [[field, 'ilike', term] for field in fields]
+        return domain
+    
+    def sync_mirror(self, model, full=False):
+        """Sincronizar la réplica local de un modelo de forma incremental
+
+        Trae solo los registros con write_date posterior a la marca de agua
+        menos ODOO_MIRROR_OVERLAP segundos, incluidos los archivados para
+        registrar su `active`. Con `full`
+        (o cada ODOO_MIRROR_RECONCILE_INTERVAL) compara además los IDs del
+        servidor para descartar los registros borrados.
+        """
+        server = server_key(self.url, self.db)
+        state = self.mirror.state(server, model)
+        if full or not state:
+            # Sin estado la réplica nunca terminó de sincronizarse: se descartan
+            # las páginas que hubiera dejado una sincronización interrumpida
+            self.mirror.forget(server, model)
+            state = {}
+        previous = state.get('high_water')
+        # Odoo pone en write_date el inicio de la transacción: una transacción larga
+        # confirma después de la última sincronización con una fecha anterior a la
+        # marca. Se vuelve a pedir un margen hacia atrás; el upsert es idempotente
+        domain = []
+        if previous:
+            since = datetime.strptime(previous, '%Y-%m-%d %H:%M:%S') - timedelta(seconds=self.mirror_overlap)
+            domain = [['write_date', '>=', since.strftime('%Y-%m-%d %H:%M:%S')]]
+        
+        high_water = previous
+        fetched = 0
+        page = []
+        for record in self.iter_records(model, domain, MIRROR_FIELDS[model], page_size=1000,
+                                        context={'active_test': False}):
+            page.append(record)
+            high_water = max(high_water or '', record.get('write_date') or '')
+            if len(page) == 1000:
+                # La marca de agua y synced_at solo avanzan al terminar (el recorrido es por ID)
+                self.mirror.upsert_many(server, model, page, complete=False)
+                fetched += len(page)
+                page = []
+        fetched += len(page)
+        
+        deleted = 0
+        reconcile = bool(state) and (
+            time.time() - (state.get('reconciled_at') or 0) > self.mirror_reconcile_interval)
+        if reconcile:
+            server_ids = {record['id'] for record in self.iter_records(
+                model, [], ['id'], page_size=5000, context={'active_test': False})}
+            gone = self.mirror.record_ids(server, model) - server_ids
+            self.mirror.delete_many(server, model, gone)
+            deleted = len(gone)
+        self.mirror.upsert_many(server, model, page, high_water, reconciled=reconcile or not state)
+        
+        print(f"🔄 Réplica de {model}: {fetched} registro(s) actualizados"
+              + (f", {deleted} eliminado(s)" if deleted else ""))
+        return {'model': model, 'fetched': fetched, 'deleted': deleted, 'high_water': high_water}
+    
+    def ensure_mirror(self, model):
+        """Sincronizar la réplica si la última sincronización supera ODOO_MIRROR_TTL"""
+        state = self.mirror.state(server_key(self.url, self.db), model)
+        if not state or time.time() - state['synced_at'] > self.mirror_ttl:
+            self.sync_mirror(model)
+    
+    def search_mirror(self, model, query=None, limit=10):
+        """Buscar registros activos en la réplica local (sincronizándola si hace falta)"""
+        self.ensure_mirror(model)
+        return self.mirror.search(server_key(self.url, self.db), model, query, limit)
+    
+    def validate_order_data(self, order_data):
+        """Comprobar en la réplica local que el cliente y los productos existen y están activos
+
+        Devuelve la lista de errores (vacía si todo es válido). Antes de dar
+        un ID por inexistente se hace una sincronización incremental, por si
+        el registro se creó después de la última.
+        """
+        checks = [
+            ('res.partner', "Cliente", [order_data['customer_id']]),
+            ('product.product', "Producto", [line['product_id'] for line in order_data['products']]),
+        ]
+        errors = []
+        for model, label, ids in checks:
+            for record_id, reason in self.invalid_record_ids(model, ids).items():
+                errors.append(f"{label} ID {record_id} {reason}")
+        return errors
+    
+    def invalid_record_ids(self, model, ids):
+        """IDs de `model` que no existen o están archivados: {id: motivo}
+
+        Con la réplica local no hay llamadas al servidor (salvo una
+        sincronización incremental si falta algún ID); sin ella se hace un
+        único `search` para todos los IDs.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        if self.mirror is None:
+            found = set(self.execute(model, 'search', [['id', 'in', ids]]))
+            return {record_id: "no existe o está archivado" for record_id in ids if record_id not in found}
+        
+        server = server_key(self.url, self.db)
+        self.ensure_mirror(model)
+        found = self.mirror.get_many(server, model, ids)
+        if len(found) < len(ids):
+            self.sync_mirror(model)
+            found = self.mirror.get_many(server, model, ids)
+        invalid = {}
+        for record_id in ids:
+            record = found.get(record_id)
+            if record is None:
+                invalid[record_id] = "no existe"
+            elif not record.get('active', True):
+                invalid[record_id] = f"({record['name']}) está archivado"
+        return invalid
+    
+    def search_customers(self, limit=10, query=None):
         """Buscar clientes existentes"""
         try:
-            # Consulta básica que sabemos que funciona
-            customer_ids = self.execute('res.partner', 'search', [])
-            if customer_ids:
-                # Tomar solo los primeros registros
-                limited_ids = customer_ids[:limit] if len(customer_ids) > limit else customer_ids
-                customers = self.execute('res.partner', 'read', limited_ids, ['name', 'email'])
-                return customers
+            if self.mirror is not None:
+                customers = self.search_mirror('res.partner', query, limit)
             else:
+                customers = list(self.iter_records('res.partner',
+                                                   self.text_domain(query, ['name', 'email']),
+                                                   ['name', 'email'], page_size=limit, limit=limit))
+            if not customers:
                 print("No se encontraron partners")
-                return []
+            return customers
                 
         except Exception as e:
             print(f"Error buscando clientes: {e}")
             return []
     
-    def search_products(self, limit=10):
+    def search_products(self, limit=10, query=None):
         """Buscar productos existentes"""
+        fields = ['name', 'list_price', 'default_code']
+        domain = self.text_domain(query, ['name', 'default_code'])
         try:
-            # Consulta básica de productos
-            product_ids = self.execute('product.product', 'search', [])
-            
-            if product_ids:
-                # Tomar solo los primeros registros
-                limited_ids = product_ids[:limit] if len(product_ids) > limit else product_ids
-                products = self.execute('product.product', 'read', limited_ids, 
-                                      ['name', 'list_price', 'default_code'])
-                return products
+            if self.mirror is not None:
+                products = self.search_mirror('product.product', query, limit)
             else:
+                products = list(self.iter_records('product.product', domain, fields,
+                                                  page_size=limit, limit=limit))
+            if not products:
                 print("No se encontraron productos")
-                return []
+            return products
                 
         except Exception as e:
             print(f"Error buscando productos: {e}")
             # Intentar con product.template como alternativa
             try:
                 print("Intentando buscar en product.template...")
-                template_ids = self.execute('product.template', 'search', [])
-                if template_ids:
-                    limited_ids = template_ids[:limit] if len(template_ids) > limit else template_ids
-                    templates = self.execute('product.template', 'read', limited_ids, 
-                                           ['name', 'list_price', 'default_code'])
-                    return templates
+                return list(self.iter_records('product.template', domain, fields,
+                                              page_size=limit, limit=limit))
             except Exception as e2:
                 print(f"Error en product.template: {e2}")
             return []
@@ -170,27 +542,23 @@ class OdooConnector:
     def create_sale_order_with_type(self, order_data, order_type_id=None):
         """Crear orden de venta con tipo específico"""
         try:
-            # Preparar datos de la orden
-            sale_order_data = {
-                'partner_id': order_data['customer_id'],
-                'date_order': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'order_line': []
-            }
+            # Validar cliente y productos en la réplica local antes de ir al servidor
+            if self.mirror is not None:
+                try:
+                    errors = self.validate_order_data(order_data)
+                except Exception as e:
+                    print(f"⚠️ No se pudo validar con la réplica local: {e}")
+                    errors = []
+                if errors:
+                    for error in errors:
+                        print(f"❌ {error}")
+                    return None
             
-            # Agregar tipo de pedido si se especifica
+            # Preparar datos de la orden
+            sale_order_data = self.sale_order_vals(order_data, order_type_id)
             if order_type_id:
-                sale_order_data['type_id'] = order_type_id
                 print(f"📋 Asignando tipo de pedido ID: {order_type_id}")
             
-            # Agregar líneas de productos
-            for line in order_data['products']:
-                order_line = (0, 0, {
-                    'product_id': line['product_id'],
-                    'product_uom_qty': line['quantity'],
-                    'price_unit': line.get('price', 0)
-                })
-                sale_order_data['order_line'].append(order_line)
-            
             # Crear la orden
             order_id = self.execute('sale.order', 'create', sale_order_data)
             print(f"✅ Orden de venta creada con ID: {order_id}")
@@ -200,6 +568,258 @@ class OdooConnector:
             print(f"❌ Error creando orden de venta: {e}")
             return None
     
+    def sale_order_vals(self, order_data, order_type_id=None):
+        """Valores de sale.order para create a partir de los datos de una orden"""
+        sale_order_data = {
+            'partner_id': order_data['customer_id'],
+            'date_order': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'order_line': []
+        }
+        
+        # Agregar tipo de pedido si se especifica
+        if order_type_id:
+            sale_order_data['type_id'] = order_type_id
+        
+        # Agregar líneas de productos
+        for line in order_data['products']:
+            order_line = (0, 0, {
+                'product_id': line['product_id'],
+                'product_uom_qty': line['quantity'],
+                'price_unit': line.get('price', 0)
+            })
+            sale_order_data['order_line'].append(order_line)
+        return sale_order_data
+    
+    def create_order_chunk(self, orders, order_type_id=None):
+        """Validar y crear un bloque de órdenes leídas con odoo_import.group_orders
+
+        Clientes y productos de todo el bloque se validan con una consulta por
+        modelo (en la réplica local si está activa) y las órdenes válidas se
+        crean con un único `create` con la lista de valores. Si Odoo rechaza
+        el bloque, se crea orden por orden para aislar el error; si el
+        resultado es desconocido (timeout, conexión cortada) antes se buscan
+        por client_order_ref las que sí se crearon, para no duplicarlas. Devuelve
+        [(orden, status, order_id)] con status 'created', 'invalid' (rechazada
+        localmente) o 'error' (rechazada por Odoo); los errores quedan en
+        orden['errors'] con su fila.
+        """
+        candidates = [order for order in orders if not order['errors']]
+        try:
+            bad_partners = self.invalid_record_ids('res.partner', [o['customer_id'] for o in candidates])
+            bad_products = self.invalid_record_ids(
+                'product.product', [line['product_id'] for o in candidates for line in o['products']])
+        except Exception as e:
+            print(f"⚠️ No se pudieron validar clientes y productos: {e}")
+            bad_partners, bad_products = {}, {}
+        for order in candidates:
+            if order['customer_id'] in bad_partners:
+                order['errors'].append({'row': order['rows'][0], 'error':
+                                        f"Cliente ID {order['customer_id']} {bad_partners[order['customer_id']]}"})
+            for line in order['products']:
+                if line['product_id'] in bad_products:
+                    order['errors'].append({'row': line['row'], 'error':
+                                            f"Producto ID {line['product_id']} {bad_products[line['product_id']]}"})
+        
+        outcome = {}
+        valid = []
+        for order in orders:
+            if order['errors']:
+                outcome[order['key']] = (order, 'invalid', None)
+            else:
+                valid.append(order)
+        
+        if valid:
+            vals = []
+            for order in valid:
+                order_vals = self.sale_order_vals(order, order['type_id'] or order_type_id)
+                order_vals['client_order_ref'] = order['order_ref']
+                vals.append(order_vals)
+            try:
+                order_ids = self.execute('sale.order', 'create', vals)
+                if isinstance(order_ids, int):
+                    order_ids = [order_ids]
+                for order, order_id in zip(valid, order_ids):
+                    outcome[order['key']] = (order, 'created', order_id)
+            except Exception as e:
+                print(f"⚠️ Falló la creación del bloque ({len(valid)} órdenes): {e}")
+                existing = {}
+                if not was_rejected(e):
+                    # Odoo pudo haber creado el bloque antes de cortarse la respuesta
+                    try:
+                        for found in self.execute('sale.order', 'search_read',
+                                                  [['client_order_ref', 'in', [o['order_ref'] for o in valid]]],
+                                                  ['client_order_ref'], order='id'):
+                            existing.setdefault(found['client_order_ref'], found['id'])
+                    except Exception as e_search:
+                        existing = None
+                        print(f"❌ No se pudo comprobar qué órdenes se crearon: {e_search}")
+                    else:
+                        print(f"🔍 {len(existing)} orden(es) del bloque ya estaban creadas en Odoo")
+                
+                retry = []
+                for order, order_vals in zip(valid, vals):
+                    if existing is None:
+                        order['errors'].append({'row': order['rows'][0],
+                                                'error': f"Resultado desconocido, revisar en Odoo: {e}"})
+                        outcome[order['key']] = (order, 'error', None)
+                    elif order['order_ref'] in existing:
+                        outcome[order['key']] = (order, 'created', existing[order['order_ref']])
+                    else:
+                        retry.append((order, order_vals))
+                if retry:
+                    print("🔁 Creando orden por orden...")
+                for order, order_vals in retry:
+                    try:
+                        outcome[order['key']] = (order, 'created', self.execute('sale.order', 'create', order_vals))
+                    except Exception as e_order:
+                        error = (str(e_order) if was_rejected(e_order) else
+                                 f"Resultado desconocido, revisar en Odoo: {e_order}")
+                        order['errors'].append({'row': order['rows'][0], 'error': error})
+                        outcome[order['key']] = (order, 'error', None)
+            print(f"✅ Bloque creado: {sum(1 for _, status, _ in outcome.values() if status == 'created')}"
+                  f"/{len(orders)} órdenes")
+        return [outcome[order['key']] for order in orders]
+    
+    def import_sale_orders(self, path, fmt=None, chunk_size=None, order_type_id=None):
+        """Crear órdenes de venta desde un archivo JSONL o CSV, por bloques
+
+        El archivo se lee por filas y se agrupa en órdenes por `order_ref`,
+        que queda como client_order_ref. Cada bloque de `chunk_size` órdenes
+        (ODOO_IMPORT_CHUNK) se valida y crea con create_order_chunk.
+
+        Devuelve {order_ref: resultado} con status 'created', 'invalid'
+        (rechazada localmente) o 'error' (rechazada por Odoo), order_id, las
+        filas de la orden y los errores atribuidos a cada fila.
+        """
+        chunk_size = max(1, chunk_size or env_int('ODOO_IMPORT_CHUNK', 100))
+        results = {}
+        counts = Counter()
+        
+        for chunk in chunked(group_orders(read_rows(path, fmt)), chunk_size):
+            for order, status, order_id in self.create_order_chunk(chunk, order_type_id):
+                results[order['key']] = {'status': status, 'order_id': order_id,
+                                         'rows': order['rows'], 'errors': order['errors']}
+                counts[status] += 1
+                counts['bad_rows'] += len(order['errors'])
+        
+        print(f"📊 Importación: {counts['created']} órdenes creadas, {counts['invalid']} rechazadas localmente, "
+              f"{counts['error']} rechazadas por Odoo - {counts['bad_rows']} fila(s) con error")
+        return results
+    
+    def run_batch(self, path, fmt=None, chunk_size=None, order_type_id=None, download=True, max_wait=30,
+                  journal_path=None):
+        """Carga por lotes reanudable: crear, confirmar y descargar los PDFs de un archivo de órdenes
+
+        El `order_ref` de cada orden es su clave de idempotencia: se guarda en
+        Odoo como client_order_ref y el diario local (ODOO_JOURNAL, por
+        defecto .odoo_cache/journal.sqlite) registra el último paso completado.
+        Al repetir la carga tras una interrupción se saltan los pasos hechos, y
+        las órdenes sin registro se buscan en Odoo con un único search_read por
+        bloque (pudieron crearse justo antes del corte) en vez de crearlas otra vez.
+
+        Devuelve {order_ref: resultado} con el paso alcanzado (step, None si
+        no se creó), order_id, resumed (se saltó trabajo ya hecho), las filas
+        y los errores.
+        """
+        chunk_size = max(1, chunk_size or env_int('ODOO_IMPORT_CHUNK', 100))
+        journal = RunJournal(journal_path or env_str('ODOO_JOURNAL') or os.path.join(cache_dir(), 'journal.sqlite'))
+        server = server_key(self.url, self.db)
+        results = {}
+        counts = Counter()
+        
+        def advance(step, entries):
+            journal.mark_many(server, step, entries)
+            for order_ref, order_id in entries:
+                results[order_ref].update(step=step, order_id=order_id)
+                counts[step] += 1
+        
+        def fail(order_ref, error):
+            results[order_ref]['errors'].append({'row': None, 'error': error})
+            journal.note_error(server, order_ref, error)
+        
+        try:
+            for chunk in chunked(group_orders(read_rows(path, fmt)), chunk_size):
+                refs = [order['order_ref'] for order in chunk if not order['errors']]
+                known = journal.get_many(server, refs)
+                
+                # Sin registro en el diario: buscar las que una ejecución cortada ya creó
+                unknown = [ref for ref in refs if ref not in known]
+                existing = {}
+                if unknown:
+                    for order in self.execute('sale.order', 'search_read', [['client_order_ref', 'in', unknown]],
+                                              ['client_order_ref', 'state'], order='id'):
+                        if order['client_order_ref'] in existing:
+                            print(f"⚠️ {order['client_order_ref']}: hay varias órdenes con esa referencia, "
+                                  f"se usa la {existing[order['client_order_ref']]['id']}")
+                            continue
+                        existing[order['client_order_ref']] = order
+                
+                to_create = []
+                for order in chunk:
+                    ref = order['order_ref']
+                    entry = known.get(ref) if not order['errors'] else None
+                    if entry is None and ref in existing and not order['errors']:
+                        found = existing[ref]
+                        step = 'confirmed' if found['state'] in ('sale', 'done') else 'created'
+                        entry = {'step': step, 'order_id': found['id']}
+                        journal.mark_many(server, step, [(ref, found['id'])])
+                        counts['recovered'] += 1
+                    if entry is None:
+                        to_create.append(order)
+                        continue
+                    results[order['key']] = {'step': entry['step'], 'order_id': entry['order_id'],
+                                             'resumed': True, 'rows': order['rows'], 'errors': []}
+                    counts['resumed'] += 1
+                
+                if to_create:
+                    created = []
+                    for order, status, order_id in self.create_order_chunk(to_create, order_type_id):
+                        results[order['key']] = {'step': None, 'order_id': None, 'resumed': False,
+                                                 'rows': order['rows'], 'errors': order['errors']}
+                        if status == 'created':
+                            created.append((order['key'], order_id))
+                        else:
+                            counts[status] += 1
+                    advance('created', created)
+                
+                # Confirmar las que siguen en borrador
+                pending = {ref: results[ref]['order_id'] for ref in refs if results[ref]['step'] == 'created'}
+                if pending:
+                    confirmed = self.confirm_sale_orders(list(pending.values()))
+                    done = []
+                    for ref, order_id in pending.items():
+                        result = confirmed.get(order_id, {})
+                        if result.get('status') == 'confirmed' or result.get('state') in ('sale', 'done'):
+                            done.append((ref, order_id))
+                        else:
+                            fail(ref, result.get('error') or f"No se pudo confirmar (estado {result.get('state')})")
+                    advance('confirmed', done)
+                
+                # Descargar los PDFs de las confirmadas que aún no los tienen
+                pending = {ref: results[ref]['order_id'] for ref in refs if results[ref]['step'] == 'confirmed'}
+                if download and pending:
+                    invoices = {}
+                    for invoice in self.download_invoices(list(pending.values()), max_wait).values():
+                        invoices.setdefault(invoice['order_id'], []).append(invoice)
+                    done = []
+                    for ref, order_id in pending.items():
+                        missing = [inv['name'] for inv in invoices.get(order_id, []) if not inv.get('filename')]
+                        if order_id not in invoices:
+                            # Sin facturas todavía: queda confirmada para la próxima ejecución
+                            fail(ref, "La orden no tiene facturas")
+                        elif missing:
+                            fail(ref, f"Faltan PDFs: {', '.join(missing)}")
+                        else:
+                            done.append((ref, order_id))
+                    advance('downloaded', done)
+        finally:
+            journal.close()
+        
+        print(f"📊 Carga por lotes: {counts['created']} creadas, {counts['confirmed']} confirmadas, "
+              f"{counts['downloaded']} con PDFs - {counts['resumed']} retomadas del diario o de Odoo "
+              f"({counts['recovered']} encontradas en Odoo), {counts['invalid'] + counts['error']} rechazadas")
+        return results
+    
     def create_sale_order(self, order_data):
         """Crear orden de venta (método legacy para compatibilidad)"""
         return self.create_sale_order_with_type(order_data, None)
@@ -233,17 +853,21 @@ class OdooConnector:
                 created_invoices = [inv for inv in new_invoices if inv not in old_invoices]
                 print(f"🎉 ¡Factura(s) creada(s) automáticamente!")
                 
+                # Leer todas las facturas nuevas en una sola llamada
+                try:
+                    invoices = self.read_records('account.move', created_invoices,
+                                                 ['name', 'state', 'amount_total', 'invoice_origin'])
+                except Exception:
+                    invoices = {}
+                
                 for inv_id in created_invoices:
-                    try:
-                        invoice = self.execute('account.move', 'read', [inv_id], 
-                                             ['name', 'state', 'amount_total', 'invoice_origin'])
-                        if invoice:
-                            inv_data = invoice[0]
-                            print(f"   📄 Factura: {inv_data['name']}")
-                            print(f"      Estado: {inv_data['state']}")
-                            print(f"      Origen: {inv_data.get('invoice_origin', 'N/A')}")
-                            print(f"      Total: ${inv_data['amount_total']}")
-                    except Exception:
+                    inv_data = invoices.get(inv_id)
+                    if inv_data:
+                        print(f"   📄 Factura: {inv_data['name']}")
+                        print(f"      Estado: {inv_data['state']}")
+                        print(f"      Origen: {inv_data.get('invoice_origin', 'N/A')}")
+                        print(f"      Total: ${inv_data['amount_total']}")
+                    else:
                         print(f"   📄 Factura ID: {inv_id} (creada)")
                         
             else:
@@ -256,6 +880,125 @@ class OdooConnector:
             print(f"❌ Error confirmando orden: {e}")
             return False
     
+    def confirm_sale_orders(self, order_ids, chunk_size=None):
+        """Confirmar muchas órdenes con una llamada action_confirm por bloque
+
+        Por cada bloque de `chunk_size` órdenes (ODOO_CONFIRM_CHUNK) se hace
+        una lectura antes, un action_confirm, una lectura después y una
+        lectura de las facturas nuevas, en vez de cuatro llamadas por orden.
+        Si Odoo rechaza el bloque (basta una orden inválida para que revierta
+        todo) se confirma orden por orden para aislar el error. Si el
+        resultado es desconocido (timeout, conexión cortada) antes se relee
+        el estado para no dar por fallidas las que sí se confirmaron.
+
+        Devuelve {order_id: resultado} con status 'confirmed', 'skipped'
+        (ya no estaba en borrador), 'not_found' o 'error', y las facturas
+        creadas automáticamente por el tipo de pedido.
+        """
+        chunk_size = max(1, chunk_size or env_int('ODOO_CONFIRM_CHUNK', 100))
+        order_ids = list(dict.fromkeys(order_ids))
+        
+        # type_id solo existe con el módulo sale_order_type
+        fields = ['name', 'state', 'invoice_ids', 'invoice_status']
+        has_type = 'type_id' in self.get_fields_info('sale.order')
+        if has_type:
+            fields.append('type_id')
+        order_types = {}
+        
+        results = {}
+        for start in range(0, len(order_ids), chunk_size):
+            chunk = order_ids[start:start + chunk_size]
+            # search_read y no read: los IDs inexistentes no hacen fallar el bloque
+            before = {order['id']: order for order in self.execute(
+                'sale.order', 'search_read', [['id', 'in', chunk]], fields)}
+            
+            to_confirm = []
+            for order_id in chunk:
+                order = before.get(order_id)
+                if order is None:
+                    results[order_id] = {'status': 'not_found', 'error': "La orden no existe"}
+                elif order['state'] not in ('draft', 'sent'):
+                    results[order_id] = {'status': 'skipped', 'name': order['name'], 'state': order['state']}
+                else:
+                    to_confirm.append(order_id)
+            if not to_confirm:
+                continue
+            
+            try:
+                self.execute('sale.order', 'action_confirm', to_confirm)
+                confirmed = to_confirm
+            except Exception as e:
+                print(f"⚠️ Falló la confirmación del bloque ({len(to_confirm)} órdenes): {e}")
+                confirmed, retry = [], to_confirm
+                if not was_rejected(e):
+                    # Odoo pudo haber confirmado el bloque antes de cortarse la respuesta
+                    try:
+                        states = {order['id']: order['state'] for order in self.execute(
+                            'sale.order', 'search_read', [['id', 'in', to_confirm]], ['state'])}
+                    except Exception as e_read:
+                        print(f"❌ No se pudo comprobar qué órdenes se confirmaron: {e_read}")
+                        states, retry = {}, []
+                        for order_id in to_confirm:
+                            results[order_id] = {'status': 'error', 'name': before[order_id]['name'],
+                                                 'error': f"Resultado desconocido, revisar en Odoo: {e}"}
+                    confirmed = [order_id for order_id in to_confirm if states.get(order_id) in ('sale', 'done')]
+                    retry = [order_id for order_id in retry if order_id not in confirmed]
+                if retry:
+                    print("🔁 Confirmando orden por orden...")
+                for order_id in retry:
+                    try:
+                        self.execute('sale.order', 'action_confirm', [order_id])
+                        confirmed.append(order_id)
+                    except Exception as e_order:
+                        results[order_id] = {'status': 'error', 'name': before[order_id]['name'],
+                                             'error': str(e_order) if was_rejected(e_order) else
+                                             f"Resultado desconocido, revisar en Odoo: {e_order}"}
+            if not confirmed:
+                continue
+            
+            after = self.read_records('sale.order', confirmed, fields)
+            created = {order_id: [inv for inv in after[order_id]['invoice_ids']
+                                  if inv not in before[order_id]['invoice_ids']]
+                       for order_id in confirmed}
+            try:
+                invoices = self.read_records('account.move', [inv for ids in created.values() for inv in ids],
+                                             ['name', 'state', 'amount_total'])
+            except Exception:
+                invoices = {}
+            
+            # auto_invoice de los tipos de pedido, leído una sola vez por tipo
+            type_ids = {after[o]['type_id'][0] for o in confirmed if has_type and after[o].get('type_id')}
+            missing_types = [t for t in type_ids if t not in order_types]
+            if missing_types:
+                try:
+                    type_fields = ['name'] + (['auto_invoice'] if 'auto_invoice' in
+                                              self.get_fields_info('sale.order.type') else [])
+                    order_types.update(self.read_records('sale.order.type', missing_types, type_fields))
+                except Exception:
+                    pass
+            
+            for order_id in confirmed:
+                order = after[order_id]
+                order_type = order_types.get(order['type_id'][0]) if has_type and order.get('type_id') else None
+                results[order_id] = {
+                    'status': 'confirmed',
+                    'name': order['name'],
+                    'state': order['state'],
+                    'invoice_status': order.get('invoice_status'),
+                    'type': order['type_id'][1] if has_type and order.get('type_id') else None,
+                    'auto_invoice': order_type.get('auto_invoice') if order_type else None,
+                    'invoices': [invoices.get(inv, {'id': inv}) for inv in created[order_id]],
+                }
+            
+            done = min(start + chunk_size, len(order_ids))
+            print(f"✅ Confirmadas {len(confirmed)}/{len(chunk)} órdenes del bloque "
+                  f"({done}/{len(order_ids)}) - facturas nuevas: {sum(len(i) for i in created.values())}")
+        
+        counts = Counter(result['status'] for result in results.values())
+        print(f"📊 Confirmación masiva: {counts['confirmed']} confirmadas, {counts['skipped']} omitidas, "
+              f"{counts['error']} con error, {counts['not_found']} inexistentes")
+        return {order_id: results[order_id] for order_id in order_ids}
+    
     def generate_invoice_pdf(self, invoice_id):
         """Generar PDF de factura usando el botón 'Enviar e imprimir'"""
         try:
@@ -289,14 +1032,16 @@ class OdooConnector:
                         
                         # Ejecutar la acción de generar/descargar
                         try:
-                            download_result = self.execute('account.move.send', 'action_send_and_print', [wizard_id])
+                            download_result = self.execute('account.move.send', 'action_send_and_print',
+                                                           [wizard_id])
                             print(f"📄 Resultado descarga: {type(download_result)}")
                             
                         except Exception as e_download:
                             print(f"Info descarga: {e_download}")
                             # Intentar método alternativo
                             try:
-                                download_result = self.execute('account.move.send', 'action_download', [wizard_id])
+                                download_result = self.execute('account.move.send', 'action_download',
+                                                               [wizard_id])
                                 print(f"📄 Resultado action_download: {type(download_result)}")
                             except Exception as e_download2:
                                 print(f"Info action_download: {e_download2}")
@@ -315,6 +1060,268 @@ class OdooConnector:
             print(f"❌ Error general generando PDF: {e}")
             return False
     
+    def web_path(self, path):
+        """Ruta web de Odoo relativa a la URL base configurada"""
+        return urlsplit(self.url).path.rstrip('/') + path
+    
+    def web_session(self, force=False):
+        """Abrir (o reutilizar) una sesión web autenticada y devolver su cookie"""
+        if self.session_id and not force:
+            return self.session_id
+        
+        body = json.dumps({
+            'jsonrpc': '2.0', 'method': 'call',
+            'params': {'db': self.db, 'login': self.username, 'password': self.password},
+        }).encode('utf-8')
+        status, headers, content = self.transport.http_request(
+            urlsplit(self.url).netloc, 'POST', self.web_path('/web/session/authenticate'),
+            body, {'Content-Type': 'application/json'})
+        
+        result = json.loads(content or b'{}') if status == 200 else {}
+        if status != 200 or result.get('error') or not result.get('result'):
+            error = result.get('error', {}).get('data', {}).get('message') or f"HTTP {status}"
+            raise ValueError(f"No se pudo abrir sesión web: {error}")
+        
+        cookie = SimpleCookie(headers.get('set-cookie', ''))
+        if 'session_id' not in cookie:
+            raise ValueError("Odoo no devolvió la cookie de sesión")
+        self.session_id = cookie['session_id'].value
+        return self.session_id
+    
+    def render_invoice_pdfs(self, invoice_ids, report_name=None):
+        """Renderizar el PDF de varias facturas en una sola petición
+
+        Pide el informe a la ruta /report/pdf con una sesión web autenticada,
+        sin wizard ni espera de adjuntos; Odoo devuelve un único PDF con todas
+        las facturas. Si la ruta no responde con un PDF se intenta
+        `ir.actions.report.render_qweb_pdf` por XML-RPC (Odoo 13 o anterior).
+        """
+        report_name = report_name or self.invoice_report
+        ids = ','.join(str(inv) for inv in invoice_ids)
+        path = self.web_path(f'/report/pdf/{report_name}/{ids}')
+        
+        status = None
+        for attempt in (0, 1):
+            try:
+                session_id = self.web_session(force=attempt > 0)
+                status, headers, content = self.transport.http_request(
+                    urlsplit(self.url).netloc, 'GET', path,
+                    headers={'Cookie': f'session_id={session_id}'})
+            except Exception as e:
+                status = str(e)
+                break
+            if status == 200 and content.startswith(b'%PDF'):
+                self.stats['pdf_renders'] += 1
+                return content
+            # Sesión caducada: Odoo redirige al login, se reintenta con sesión nueva
+        
+        try:
+            content = self.render_report_rpc(report_name, invoice_ids)
+        except Exception as e:
+            raise ValueError(f"No se pudo renderizar {report_name} (HTTP: {status}; XML-RPC: {e})")
+        self.stats['pdf_renders'] += 1
+        return content
+    
+    def render_report_rpc(self, report_name, record_ids):
+        """Renderizar un informe por XML-RPC con render_qweb_pdf (Odoo 13 o anterior)"""
+        reports = self.execute('ir.actions.report', 'search_read',
+                               [['report_name', '=', report_name]], ['id'], limit=1)
+        if not reports:
+            raise ValueError(f"Informe {report_name} no encontrado")
+        
+        result = self.execute('ir.actions.report', 'render_qweb_pdf', [reports[0]['id']], list(record_ids))
+        data = result[0] if isinstance(result, (list, tuple)) else result
+        if isinstance(data, xmlrpc.client.Binary):
+            data = data.data
+        elif isinstance(data, str):
+            data = base64.b64decode(data)
+        if not data or not data.startswith(b'%PDF'):
+            raise ValueError("La respuesta no es un PDF")
+        return data
+    
+    def lookup_indexed_attachments(self, invoice_ids):
+        """Comprobar en una sola consulta los adjuntos ya conocidos de varias facturas
+
+        Devuelve {invoice_id: adjunto} solo para las entradas del índice cuyo
+        adjunto sigue existiendo con el mismo checksum y pertenece a la
+        factura: adjunto de la propia factura o de un mensaje de su chatter.
+        Las obsoletas se borran.
+        """
+        if self.attachment_index is None:
+            return {}
+        server = server_key(self.url, self.db)
+        entries = self.attachment_index.get_many(server, invoice_ids)
+        if not entries:
+            return {}
+        
+        attachment_ids = [entry['attachment_id'] for entry in entries.values()]
+        attachments = {att['id']: att for att in self.search_attachments(
+            [['id', 'in', attachment_ids]], extra_fields=['res_model', 'res_id'])}
+        
+        # Adjuntos que no cuelgan de la factura: solo valen si vienen de su chatter
+        # (una consulta, y solo si hay alguno; lo habitual es que no haya)
+        indirect = [invoice_id for invoice_id, entry in entries.items()
+                    if (attachments.get(entry['attachment_id']) or {}).get('res_model') != 'account.move']
+        linked = set()
+        if indirect:
+            for message in self.execute('mail.message', 'search_read',
+                                        [['model', '=', 'account.move'], ['res_id', 'in', indirect]],
+                                        ['res_id', 'attachment_ids']):
+                linked.update((message['res_id'], att_id) for att_id in message['attachment_ids'])
+                linked.add((message['res_id'], ('mail.message', message['id'])))
+        
+        def belongs(invoice_id, attachment):
+            if attachment['res_model'] == 'account.move':
+                return attachment['res_id'] == invoice_id
+            return ((invoice_id, attachment['id']) in linked
+                    or (invoice_id, (attachment['res_model'], attachment['res_id'])) in linked)
+        
+        valid = {}
+        for invoice_id, entry in entries.items():
+            attachment = attachments.get(entry['attachment_id'])
+            if (attachment and attachment.get('checksum') == entry['checksum']
+                    and belongs(invoice_id, attachment)):
+                valid[invoice_id] = attachment
+                self.stats['index_hits'] += 1
+            else:
+                print(f"🗂️ Entrada del índice obsoleta para factura {invoice_id}")
+                self.attachment_index.forget(server, invoice_id)
+                self.stats['index_stale'] += 1
+        return valid
+    
+    def remember_attachment(self, invoice_id, attachment, source):
+        """Registrar en el índice local el adjunto PDF de una factura"""
+        if self.attachment_index is not None:
+            self.attachment_index.put(server_key(self.url, self.db), invoice_id, attachment, source)
+    
+    def search_attachments(self, domain, extra_fields=()):
+        """Buscar adjuntos trayendo solo metadatos (sin el contenido datas)"""
+        attachments = self.execute('ir.attachment', 'search_read', domain,
+                                   ATTACHMENT_META_FIELDS + list(extra_fields))
+        # Bytes que la búsqueda habría transferido si pidiera también el contenido
+        self.stats['attachment_bytes_listed'] += sum(att.get('file_size') or 0 for att in attachments)
+        return attachments
+    
+    def fetch_attachment_body(self, attachment):
+        """Descargar el contenido de un único adjunto ya elegido"""
+        result = self.execute('ir.attachment', 'read', [attachment['id']], ['datas'])
+        if not result or not result[0].get('datas'):
+            raise ValueError(f"El adjunto {attachment['id']} no tiene contenido")
+        
+        content = base64.b64decode(result[0]['datas'])
+        self.stats['attachment_bodies_fetched'] += 1
+        self.stats['attachment_bytes_fetched'] += len(content)
+        return content
+    
+    def streams_attachment(self, attachment):
+        """¿Descargar este adjunto en streaming? (XML-RPC y tamaño >= ODOO_STREAM_THRESHOLD)"""
+        return (self.protocol == 'xmlrpc' and self.stream_threshold > 0
+                and (attachment.get('file_size') or 0) >= self.stream_threshold)
+    
+    def stream_attachment_body(self, attachment, file):
+        """Descargar el contenido de un adjunto directamente a un archivo abierto
+
+        La respuesta XML-RPC se parsea a medida que llega y el base64 se
+        decodifica por trozos, así que la memoria usada no depende del tamaño
+        del PDF. Devuelve el SHA-1 del contenido escrito.
+        """
+        endpoint = urlsplit(f'{self.url}/xmlrpc/2/object')
+        request_body = xmlrpc.client.dumps(
+            (self.db, self.uid, self.password, 'ir.attachment', 'read', [[attachment['id']], ['datas']], {}),
+            'execute_kw').encode('utf-8', 'xmlcharrefreplace')
+        
+        def fetch():
+            # Cada intento empieza con el archivo vacío
+            file.seek(0)
+            file.truncate()
+            sink = Base64Sink(file)
+            self.transport.stream_request(endpoint.netloc, endpoint.path, request_body,
+                                          StreamingUnmarshaller('datas', sink))
+            if not sink.size:
+                raise ValueError(f"El adjunto {attachment['id']} no tiene contenido")
+            return sink.size, sink.close()
+        
+        self.stats['rpc_calls'] += 1
+        size, checksum = self.retry_policy.call(
+            'read', lambda: self.call_rpc('ir.attachment', 'read', fetch), label='ir.attachment.read')
+        self.stats['attachment_bodies_fetched'] += 1
+        self.stats['attachment_bodies_streamed'] += 1
+        self.stats['attachment_bytes_fetched'] += size
+        return checksum
+    
+    def attachment_bytes_avoided(self):
+        """Bytes de PDFs listados pero nunca descargados gracias a la búsqueda por metadatos"""
+        return max(0, self.stats['attachment_bytes_listed'] - self.stats['attachment_bytes_fetched'])
+    
+    def write_pdf(self, filename, pdf_content, origin):
+        """Guardar el contenido de un PDF en disco
+
+        Se escribe en un temporal y se renombra: si `filename` era un enlace
+        al almacén de PDFs, el almacén no se modifica.
+        """
+        tmp_name = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_name, 'wb') as f:
+            f.write(pdf_content)
+        os.replace(tmp_name, filename)
+        
+        print(f"✅ PDF descargado {origin}: {filename}")
+        print(f"📁 Tamaño: {len(pdf_content)} bytes")
+        return filename
+    
+    def stream_pdf(self, filename, attachment, origin):
+        """Descargar un adjunto en streaming a `filename` (temporal y renombrado atómico)"""
+        tmp_name = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_name, 'wb') as f:
+                self.stream_attachment_body(attachment, f)
+            os.replace(tmp_name, filename)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        
+        print(f"✅ PDF descargado {origin} (streaming): {filename}")
+        print(f"📁 Tamaño: {os.path.getsize(filename)} bytes")
+        return filename
+    
+    def save_attachment(self, attachment, filename, origin, invoice_id=None, source=None):
+        """Descargar el adjunto elegido y guardarlo en disco
+
+        Con el almacén de PDFs activo, el contenido solo se descarga si su
+        checksum no está ya en el almacén, y el archivo se publica como
+        enlace al almacén. Si se indica la factura, el adjunto queda
+        registrado en el índice local junto con `source` (cómo se encontró).
+        """
+        # Usar nombre del adjunto si está disponible (sin rutas: solo el nombre)
+        if attachment['name'] and attachment['name'].endswith('.pdf'):
+            filename = os.path.basename(attachment['name'].replace('\\', '/'))
+        
+        checksum = attachment.get('checksum')
+        if self.pdf_store is not None and checksum:
+            size = attachment.get('file_size')
+            if self.pdf_store.has(checksum, size):
+                self.stats['pdf_store_hits'] += 1
+                origin += " (ya en el almacén local, sin transferencia)"
+            elif self.streams_attachment(attachment):
+                checksum = self.pdf_store.put_stream(
+                    checksum, lambda f: self.stream_attachment_body(attachment, f))
+                size = os.path.getsize(self.pdf_store.path_for(checksum))
+            else:
+                checksum = self.pdf_store.put(checksum, self.fetch_attachment_body(attachment))
+                size = os.path.getsize(self.pdf_store.path_for(checksum))
+            filename = self.pdf_store.link(checksum, filename)
+            print(f"✅ PDF descargado {origin}: {filename}")
+            print(f"📁 Tamaño: {size} bytes")
+        elif self.streams_attachment(attachment):
+            self.stream_pdf(filename, attachment, origin)
+        else:
+            self.write_pdf(filename, self.fetch_attachment_body(attachment), origin)
+        print(f"💾 Bytes de PDF no transferidos (acumulado): {self.attachment_bytes_avoided()}")
+        
+        if invoice_id is not None:
+            self.remember_attachment(invoice_id, attachment, source or 'direct')
+        return filename
+    
     def find_invoice_attachments(self, invoice_id, show_all=False):
         """Buscar todos los adjuntos relacionados con una factura"""
         try:
@@ -330,9 +1337,8 @@ class OdooConnector:
             if not show_all:
                 attachment_filters.append(['mimetype', '=', 'application/pdf'])
             
-            attachments = self.execute('ir.attachment', 'search_read',
-                                     attachment_filters,
-                                     ['name', 'mimetype', 'create_date', 'datas', 'file_size'])
+            # Solo metadatos: el contenido se descarga después para el adjunto elegido
+            attachments = self.search_attachments(attachment_filters)
             
             print(f"📎 Encontrados {len(attachments)} adjuntos totales")
             
@@ -352,51 +1358,84 @@ class OdooConnector:
             print(f"❌ Error buscando adjuntos: {e}")
             return []
     
-    def wait_for_attachments(self, invoice_id, max_wait=30):
-        """Esperar hasta que aparezcan adjuntos PDF con búsqueda más agresiva"""
-        print(f"⏳ Esperando adjuntos PDF para factura {invoice_id}...")
+    def wait_for_invoice_pdfs(self, invoice_ids, deadline=30, initial_delay=0.5, max_delay=5.0):
+        """Esperar los PDFs de varias facturas a la vez con backoff exponencial
+
+        Generador que entrega (invoice_id, adjunto) en cuanto el PDF de cada
+        factura está listo. Cada ronda hace una sola consulta `res_id in [...]`
+        para todas las facturas pendientes, y `deadline` es un plazo global
+        (en segundos) para el conjunto, no por factura. Con deadline=0 se hace
+        una única consulta.
+        """
+        pending = set(invoice_ids)
+        if not pending:
+            return
         
-        for i in range(max_wait):
-            time.sleep(1)
+        start = time.monotonic()
+        end = start + deadline
+        delay = initial_delay
+        
+        while pending:
+            attachments = self.search_attachments([['res_model', '=', 'account.move'],
+                                                   ['res_id', 'in', sorted(pending)],
+                                                   ['mimetype', '=', 'application/pdf']],
+                                                  extra_fields=['res_id'])
+            # Quedarse con el adjunto más reciente de cada factura
+            latest = {}
+            for att in attachments:
+                current = latest.get(att['res_id'])
+                if current is None or att['create_date'] > current['create_date']:
+                    latest[att['res_id']] = att
             
-            # Búsqueda más específica
-            pdf_attachments = self.find_invoice_attachments(invoice_id)
+            for invoice_id, attachment in latest.items():
+                if invoice_id in pending:
+                    pending.discard(invoice_id)
+                    if deadline:
+                        print(f"✅ PDF listo para factura {invoice_id} "
+                              f"después de {time.monotonic() - start:.1f} segundos")
+                    yield invoice_id, attachment
             
-            if pdf_attachments:
-                print(f"✅ Adjuntos encontrados después de {i+1} segundos: {len(pdf_attachments)}")
-                return True
+            remaining = end - time.monotonic()
+            if not pending or remaining <= 0:
+                break
             
-            # Cada 5 segundos, mostrar debug de todos los adjuntos
-            if i > 0 and i % 5 == 0:
-                print(f"🔍 Debug ({i+1}s): Verificando todos los adjuntos...")
-                all_attachments = self.find_invoice_attachments(invoice_id, show_all=True)
-                
-            if i % 5 == 0:  # Mostrar progreso cada 5 segundos
-                print(f"⏳ Esperando... ({i+1}/{max_wait})")
+            # Backoff exponencial con jitter para no sincronizar consultas
+            sleep_for = min(remaining, delay / 2 + random.uniform(0, delay / 2))
+            print(f"⏳ Esperando PDFs de {len(pending)} factura(s)... "
+                  f"({time.monotonic() - start:.0f}/{deadline}s)")
+            time.sleep(sleep_for)
+            delay = min(max_delay, delay * 2)
+        
+        if pending and deadline:
+            print(f"⚠️ Timeout: sin PDF después de {deadline} segundos para facturas {sorted(pending)}")
+    
+    def wait_for_attachments(self, invoice_id, max_wait=30):
+        """Esperar hasta que aparezcan adjuntos PDF de una factura"""
+        print(f"⏳ Esperando adjuntos PDF para factura {invoice_id}...")
         
-        print(f"⚠️ Timeout: No se encontraron adjuntos PDF después de {max_wait} segundos")
+        for _ in self.wait_for_invoice_pdfs([invoice_id], deadline=max_wait):
+            return True
         
         # Último intento mostrando todos los adjuntos
         print("🔍 Último intento - mostrando todos los adjuntos:")
-        all_attachments = self.find_invoice_attachments(invoice_id, show_all=True)
+        self.find_invoice_attachments(invoice_id, show_all=True)
         
         return False
     
-    def force_find_pdf(self, invoice_id):
+    def force_find_pdf(self, invoice_id, invoice_name=None):
         """Búsqueda forzada de PDFs con diferentes estrategias"""
         try:
             print(f"🔍 Búsqueda forzada de PDF para factura {invoice_id}")
             
             # Estrategia 1: Buscar por nombre de factura
-            invoice = self.execute('account.move', 'read', [invoice_id], ['name'])[0]
-            invoice_name = invoice['name']
+            if invoice_name is None:
+                invoice_name = self.execute('account.move', 'read', [invoice_id], ['name'])[0]['name']
             print(f"📋 Nombre de factura: {invoice_name}")
             
             # Buscar adjuntos que contengan el nombre de la factura
-            name_attachments = self.execute('ir.attachment', 'search_read',
-                                          [['name', 'ilike', invoice_name],
-                                           ['mimetype', '=', 'application/pdf']],
-                                          ['name', 'res_model', 'res_id', 'create_date', 'datas'])
+            name_attachments = self.search_attachments([['name', 'ilike', invoice_name],
+                                                        ['mimetype', '=', 'application/pdf']],
+                                                       extra_fields=['res_model', 'res_id'])
             
             print(f"📎 Adjuntos por nombre: {len(name_attachments)}")
             for att in name_attachments:
@@ -438,15 +1477,18 @@ class OdooConnector:
             # Estrategia 2: Buscar adjuntos recientes (últimos 10 minutos)
             ten_minutes_ago = (datetime.now() - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S')
             
-            recent_attachments = self.execute('ir.attachment', 'search_read',
-                                            [['create_date', '>=', ten_minutes_ago],
-                                             ['mimetype', '=', 'application/pdf']],
-                                            ['name', 'res_model', 'res_id', 'create_date', 'datas'])
+            recent_attachments = self.search_attachments([['create_date', '>=', ten_minutes_ago],
+                                                          ['mimetype', '=', 'application/pdf']],
+                                                         extra_fields=['res_model', 'res_id'])
             
             print(f"📅 Adjuntos recientes (últimos 10 min): {len(recent_attachments)}")
             for att in recent_attachments:
                 print(f"   • {att['name']} - {att['res_model']}.{att['res_id']} - {att['create_date']}")
                 
+                # Un PDF reciente de otra factura no sirve aunque el nombre se parezca
+                if att['res_model'] == 'account.move' and att['res_id'] != invoice_id:
+                    continue
+                
                 # Buscar por nombre de factura en adjuntos recientes
                 if invoice_name in att['name']:
                     print(f"   ✅ Adjunto reciente contiene nombre de factura!")
@@ -467,10 +1509,8 @@ class OdooConnector:
                         print(f"   📎 Mensaje {msg['id']} tiene {len(msg['attachment_ids'])} adjuntos")
                         
                         # Leer adjuntos del mensaje
-                        msg_attachments = self.execute('ir.attachment', 'search_read',
-                                                     [['id', 'in', msg['attachment_ids']],
-                                                      ['mimetype', '=', 'application/pdf']],
-                                                     ['name', 'create_date', 'datas'])
+                        msg_attachments = self.search_attachments([['id', 'in', msg['attachment_ids']],
+                                                                   ['mimetype', '=', 'application/pdf']])
                         
                         for att in msg_attachments:
                             if invoice_name in att['name']:
@@ -487,14 +1527,19 @@ class OdooConnector:
             print(f"❌ Error en búsqueda forzada: {e}")
             return None
     
-    def download_invoice_pdf(self, invoice_id, filename=None):
-        """Descargar PDF de la factura con búsqueda mejorada"""
+    def download_invoice_pdf(self, invoice_id, filename=None, invoice=None):
+        """Descargar PDF de la factura con búsqueda mejorada
+
+        `invoice` permite pasar los datos ya leídos (name, state, partner_id)
+        para no volver a leer la factura.
+        """
         try:
             print(f"📄 Descargando PDF de factura ID: {invoice_id}")
             
-            # Obtener información de la factura
-            invoice = self.execute('account.move', 'read', [invoice_id], 
-                                 ['name', 'state', 'partner_id'])[0]
+            # Obtener información de la factura si no se recibió
+            if invoice is None:
+                invoice = self.execute('account.move', 'read', [invoice_id], 
+                                     ['name', 'state', 'partner_id'])[0]
             
             if not filename:
                 # Generar nombre de archivo automático
@@ -504,6 +1549,19 @@ class OdooConnector:
             
             print(f"📋 Factura: {invoice['name']} - Cliente: {invoice['partner_id'][1]}")
             
+            # Modo informe: renderizar el PDF directamente, sin wizard ni espera
+            if self.pdf_mode == 'report':
+                try:
+                    return self.write_pdf(filename, self.render_invoice_pdfs([invoice_id]),
+                                          "renderizado directamente")
+                except Exception as e:
+                    print(f"⚠️ Renderizado directo falló, buscando adjuntos: {e}")
+            
+            # Paso 0: Adjunto ya conocido en el índice local
+            indexed = self.lookup_indexed_attachments([invoice_id]).get(invoice_id)
+            if indexed:
+                return self.save_attachment(indexed, filename, "desde el índice local")
+            
             # Paso 1: Buscar adjuntos PDF directos
             pdf_attachments = self.find_invoice_attachments(invoice_id)
             
@@ -512,20 +1570,9 @@ class OdooConnector:
                 
                 # Usar el adjunto más reciente
                 latest_attachment = max(pdf_attachments, key=lambda x: x['create_date'])
-                
-                pdf_content = base64.b64decode(latest_attachment['datas'])
-                
-                # Usar nombre del adjunto si está disponible
-                if latest_attachment['name'] and latest_attachment['name'].endswith('.pdf'):
-                    filename = latest_attachment['name']
-                
-                with open(filename, 'wb') as f:
-                    f.write(pdf_content)
-                
-                print(f"✅ PDF descargado desde adjuntos directos: {filename}")
-                print(f"📁 Tamaño: {len(pdf_content)} bytes")
                 print(f"📅 Creado: {latest_attachment['create_date']}")
-                return filename
+                return self.save_attachment(latest_attachment, filename, "desde adjuntos directos",
+                                            invoice_id, 'direct')
             
             # Paso 2: Generar PDF y esperar
             print("📎 No se encontraron adjuntos PDF directos. Generando...")
@@ -533,44 +1580,19 @@ class OdooConnector:
             if self.generate_invoice_pdf(invoice_id):
                 print("🔄 PDF generado. Esperando que aparezca...")
                 
-                # Esperar con búsqueda mejorada
-                if self.wait_for_attachments(invoice_id, max_wait=30):
-                    # Buscar nuevamente después de la espera
-                    new_pdf_attachments = self.find_invoice_attachments(invoice_id)
-                    
-                    if new_pdf_attachments:
-                        latest_attachment = max(new_pdf_attachments, key=lambda x: x['create_date'])
-                        
-                        pdf_content = base64.b64decode(latest_attachment['datas'])
-                        
-                        if latest_attachment['name'] and latest_attachment['name'].endswith('.pdf'):
-                            filename = latest_attachment['name']
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(pdf_content)
-                        
-                        print(f"✅ PDF descargado después de generación: {filename}")
-                        print(f"📁 Tamaño: {len(pdf_content)} bytes")
-                        return filename
+                # Esperar con backoff; el adjunto llega ya elegido
+                for _, attachment in self.wait_for_invoice_pdfs([invoice_id], deadline=30):
+                    return self.save_attachment(attachment, filename, "después de generación",
+                                                invoice_id, 'wizard')
                 
                 # Paso 3: Búsqueda forzada como último recurso
                 print("🔍 Intentando búsqueda forzada...")
-                forced_attachment = self.force_find_pdf(invoice_id)
+                forced_attachment = self.force_find_pdf(invoice_id, invoice['name'])
                 
-                if forced_attachment and 'datas' in forced_attachment:
+                if forced_attachment:
                     print("✅ PDF encontrado con búsqueda forzada!")
-                    
-                    pdf_content = base64.b64decode(forced_attachment['datas'])
-                    
-                    if forced_attachment['name'] and forced_attachment['name'].endswith('.pdf'):
-                        filename = forced_attachment['name']
-                    
-                    with open(filename, 'wb') as f:
-                        f.write(pdf_content)
-                    
-                    print(f"✅ PDF descargado con búsqueda forzada: {filename}")
-                    print(f"📁 Tamaño: {len(pdf_content)} bytes")
-                    return filename
+                    # Sin registrar en el índice: la búsqueda forzada puede devolver un PDF ajeno
+                    return self.save_attachment(forced_attachment, filename, "con búsqueda forzada")
                 else:
                     print("❌ No se pudo encontrar el PDF con búsqueda forzada")
                     
@@ -592,30 +1614,177 @@ class OdooConnector:
             print(f"❌ Error descargando PDF: {e}")
             return None
     
-    def download_order_invoices(self, order_id):
-        """Descargar PDFs de todas las facturas de un pedido"""
-        try:
-            # Obtener facturas del pedido
-            order = self.execute('sale.order', 'read', [order_id], 
-                               ['name', 'invoice_ids'])[0]
+    def download_invoices(self, order_ids, max_wait=30, workers=None):
+        """Descargar en paralelo los PDFs de las facturas de uno o varios pedidos
+
+        Un pool de `workers` hilos (ODOO_DOWNLOAD_WORKERS) genera y descarga
+        los PDFs; cada hilo usa su propio clon del conector y el tamaño del
+        pool es el tope de llamadas simultáneas contra Odoo. Con workers=1 todo
+        corre en el hilo que llama, con este mismo conector. Mientras tanto el
+        hilo principal espera todos los adjuntos pendientes juntos, con una
+        consulta por ronda y un plazo global de `max_wait` segundos.
+
+        Devuelve {invoice_id: resultado} en el orden de los pedidos, con
+        order_id, name, filename (None si falló), source (cómo se obtuvo el
+        PDF) y error.
+        """
+        workers = max(1, workers or env_int('ODOO_DOWNLOAD_WORKERS', 4))
+        order_ids = list(dict.fromkeys(order_ids))
+        
+        # search_read y no read: un pedido inexistente no hace fallar el resto
+        orders = {order['id']: order for order in self.execute(
+            'sale.order', 'search_read', [['id', 'in', order_ids]], ['name', 'invoice_ids'])}
+        results = {}
+        for order_id in order_ids:
+            order = orders.get(order_id)
+            if order is None:
+                print(f"❌ Pedido {order_id} no encontrado")
+            elif not order['invoice_ids']:
+                print(f"❌ No hay facturas asociadas al pedido {order['name']}")
+            for invoice_id in (order or {}).get('invoice_ids', []):
+                results[invoice_id] = {'order_id': order_id, 'name': None, 'filename': None,
+                                       'source': None, 'error': None}
+        invoice_ids = list(results)
+        if not invoice_ids:
+            return results
+        
+        # Leer todas las facturas una sola vez y reutilizar los datos
+        invoices = self.read_records('account.move', invoice_ids, ['name', 'state', 'partner_id'])
+        filenames = {}
+        for invoice_id, result in results.items():
+            result['name'] = invoices[invoice_id]['name']
+            order_name = orders[result['order_id']]['name'].replace('/', '_')
+            filenames[invoice_id] = f"pedido_{order_name}_factura_{result['name'].replace('/', '_')}.pdf"
+        
+        print(f"📋 Descargando {len(invoice_ids)} factura(s) de {len(orders)} pedido(s) "
+              f"con {min(workers, len(invoice_ids))} worker(s)")
+        
+        local = threading.local()
+        clones = []
+        lock = threading.Lock()
+        progress = Counter()
+        
+        def connector():
+            """Conector propio del hilo actual (se crea la primera vez)"""
+            if workers == 1:
+                return self
+            worker = getattr(local, 'connector', None)
+            if worker is None:
+                worker = local.connector = self.clone()
+                with lock:
+                    clones.append(worker)
+            return worker
+        
+        def finish(invoice_id, filename=None, source=None, error=None):
+            with lock:
+                results[invoice_id].update(filename=filename, source=source, error=error)
+                progress['done'] += 1
+                status = f"✅ {filename}" if filename else f"❌ {error}"
+                print(f"📥 [{progress['done']}/{len(results)}] Factura {results[invoice_id]['name']}: {status}")
+        
+        def save(invoice_id, attachment, origin, source):
+            try:
+                # Sin registrar de nuevo en el índice lo que ya viene del índice, ni lo
+                # que adivinó la búsqueda forzada (puede ser el PDF de otra factura)
+                filename = connector().save_attachment(
+                    attachment, filenames[invoice_id], origin,
+                    invoice_id if source not in ('index', 'forced') else None, source)
+                finish(invoice_id, filename, source)
+            except Exception as e:
+                finish(invoice_id, error=f"Error descargando el PDF: {e}")
+        
+        def render(order_id, order_invoice_ids):
+            """Modo informe: un único PDF por pedido con todas sus facturas"""
+            pdf_content = connector().render_invoice_pdfs(order_invoice_ids)
+            if len(order_invoice_ids) == 1:
+                filename = filenames[order_invoice_ids[0]]
+            else:
+                filename = f"pedido_{orders[order_id]['name'].replace('/', '_')}_facturas.pdf"
+            connector().write_pdf(filename, pdf_content,
+                                  f"renderizado directamente ({len(order_invoice_ids)} factura(s))")
+            for invoice_id in order_invoice_ids:
+                finish(invoice_id, filename, 'report')
+        
+        def force(invoice_id):
+            try:
+                attachment = connector().force_find_pdf(invoice_id, invoices[invoice_id]['name'])
+            except Exception as e:
+                attachment = None
+                print(f"⚠️ Búsqueda forzada falló para factura {invoice_id}: {e}")
+            if attachment:
+                save(invoice_id, attachment, "con búsqueda forzada", 'forced')
+            else:
+                finish(invoice_id, error="No se pudo encontrar el PDF")
+        
+        executor = (InlineExecutor() if workers == 1
+                    else ThreadPoolExecutor(max_workers=workers, thread_name_prefix='odoo-pdf'))
+        with executor as pool:
+            pending = invoice_ids
             
-            if not order.get('invoice_ids'):
-                print("❌ No hay facturas asociadas a este pedido")
-                return []
+            if self.pdf_mode == 'report':
+                by_order = {}
+                for invoice_id in invoice_ids:
+                    by_order.setdefault(results[invoice_id]['order_id'], []).append(invoice_id)
+                futures = {pool.submit(render, order_id, ids): ids for order_id, ids in by_order.items()}
+                pending = []
+                for future, ids in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"⚠️ Renderizado directo falló, buscando adjuntos: {e}")
+                        pending.extend(ids)
             
-            print(f"📋 Descargando facturas del pedido {order['name']}")
-            downloaded_files = []
+            # Facturas cuyo adjunto ya se encontró (su descarga puede estar en curso)
+            found = set()
+            
+            # Paso 0: Adjuntos ya conocidos en el índice local
+            for invoice_id, attachment in self.lookup_indexed_attachments(pending).items():
+                found.add(invoice_id)
+                pool.submit(save, invoice_id, attachment, "desde el índice local", 'index')
+            
+            # Paso 1: PDFs ya existentes del resto de facturas, en una sola consulta
+            unknown = [inv for inv in pending if inv not in found]
+            for invoice_id, attachment in self.wait_for_invoice_pdfs(unknown, deadline=0):
+                found.add(invoice_id)
+                pool.submit(save, invoice_id, attachment, "desde adjuntos directos", 'direct')
+            
+            # Paso 2: Generar en paralelo los que faltan y esperarlos todos juntos
+            missing = [inv for inv in unknown if inv not in found]
+            if missing:
+                print(f"📎 Sin PDF para {len(missing)} factura(s). Generando...")
+                generating = {inv: pool.submit(lambda inv: connector().generate_invoice_pdf(inv), inv)
+                              for inv in missing}
+                generated = [inv for inv, future in generating.items() if future.result()]
+                for invoice_id, attachment in self.wait_for_invoice_pdfs(generated, deadline=max_wait):
+                    found.add(invoice_id)
+                    pool.submit(save, invoice_id, attachment, "después de generación", 'wizard')
+            
+            # Paso 3: Búsqueda forzada como último recurso
+            for invoice_id in [inv for inv in missing if inv not in found]:
+                pool.submit(force, invoice_id)
+        
+        # Sumar la actividad de los workers y cerrar sus conexiones
+        for worker in clones:
+            self.stats.update(worker.stats)
+            worker.close()
+        
+        counts = Counter('ok' if r['filename'] else 'error' for r in results.values())
+        print(f"📊 PDFs de facturas: {counts['ok']} descargados, {counts['error']} con error")
+        return results
+    
+    def download_order_invoices(self, order_id, max_wait=30, workers=None):
+        """Descargar PDFs de todas las facturas de un pedido
+
+        Las facturas se procesan en paralelo con download_invoices y se
+        esperan todas juntas, en vez de una espera completa por factura.
+        """
+        try:
+            results = self.download_invoices([order_id], max_wait=max_wait, workers=workers)
+            # En modo informe varias facturas comparten un mismo archivo
+            downloaded_files = list(dict.fromkeys(r['filename'] for r in results.values() if r['filename']))
+            if not results:
+                return []
             
-            for invoice_id in order['invoice_ids']:
-                # Generar nombre único para cada factura
-                invoice = self.execute('account.move', 'read', [invoice_id], ['name'])[0]
-                invoice_name = invoice['name'].replace('/', '_')
-                filename = f"pedido_{order['name'].replace('/', '_')}_factura_{invoice_name}.pdf"
-                
-                result = self.download_invoice_pdf(invoice_id, filename)
-                if result:
-                    downloaded_files.append(result)
-                    
             print(f"\n📁 Descargados {len(downloaded_files)} archivos:")
             for file in downloaded_files:
                 print(f"  • {file}")
@@ -626,6 +1795,120 @@ class OdooConnector:
             print(f"❌ Error descargando facturas del pedido: {e}")
             return []
     
+    def run_invoice_wizard(self, order_ids):
+        """Ejecutar el wizard de facturación (sale.advance.payment.inv) sobre varias órdenes
+
+        Las órdenes viajan en el contexto (active_ids), como al usar "Crear
+        factura" desde la lista de pedidos; no existe un método with_context
+        accesible por RPC, el contexto se pasa como argumento de cada llamada.
+        """
+        context = {'active_model': 'sale.order', 'active_ids': list(order_ids), 'active_id': order_ids[0]}
+        wizard_id = self.execute('sale.advance.payment.inv', 'create', {
+            'advance_payment_method': 'delivered',  # Facturar productos entregados
+            'deduct_down_payments': True,
+        }, context=context)
+        self.execute('sale.advance.payment.inv', 'create_invoices', [wizard_id], context=context)
+        return wizard_id
+    
+    def invoice_sale_orders(self, order_ids, chunk_size=None):
+        """Facturar muchas órdenes confirmadas con el wizard por bloques
+
+        Una lectura previa (para todas las órdenes) descarta localmente las
+        que no están en estado 'sale' o no tienen nada por facturar. Luego
+        se ejecuta el wizard una vez por bloque de `chunk_size` órdenes
+        (ODOO_INVOICE_CHUNK) y al final una sola lectura de invoice_ids
+        asigna las facturas nuevas a sus órdenes (Odoo puede agrupar varias
+        órdenes del mismo cliente en una factura). Si Odoo rechaza un bloque,
+        sus órdenes se facturan una a una para aislar el error; si el
+        resultado es desconocido, antes se releen sus facturas para no
+        facturar dos veces las que sí se procesaron.
+
+        Devuelve {order_id: resultado} con status 'invoiced', 'skipped',
+        'not_found' o 'error'.
+        """
+        chunk_size = max(1, chunk_size or env_int('ODOO_INVOICE_CHUNK', 100))
+        order_ids = list(dict.fromkeys(order_ids))
+        fields = ['name', 'state', 'invoice_status', 'invoice_ids']
+        before = {order['id']: order for order in self.execute(
+            'sale.order', 'search_read', [['id', 'in', order_ids]], fields)}
+        
+        results = {}
+        eligible = []
+        for order_id in order_ids:
+            order = before.get(order_id)
+            if order is None:
+                results[order_id] = {'status': 'not_found', 'error': "La orden no existe"}
+            elif order['state'] != 'sale':
+                results[order_id] = {'status': 'skipped', 'name': order['name'],
+                                     'reason': f"estado {order['state']}, debe estar confirmada"}
+            elif order['invoice_status'] != 'to invoice':
+                results[order_id] = {'status': 'skipped', 'name': order['name'],
+                                     'reason': f"facturación: {order['invoice_status']}"}
+            else:
+                eligible.append(order_id)
+        print(f"📋 {len(eligible)} de {len(order_ids)} órdenes para facturar")
+        
+        processed = []
+        for start in range(0, len(eligible), chunk_size):
+            chunk = eligible[start:start + chunk_size]
+            try:
+                self.run_invoice_wizard(chunk)
+                processed += chunk
+            except Exception as e:
+                print(f"⚠️ Falló la facturación del bloque ({len(chunk)} órdenes): {e}")
+                retry = chunk
+                if not was_rejected(e):
+                    # El wizard pudo haber creado las facturas antes de cortarse la respuesta
+                    try:
+                        current = self.read_records('sale.order', chunk, ['invoice_ids'])
+                    except Exception as e_read:
+                        print(f"❌ No se pudo comprobar qué órdenes se facturaron: {e_read}")
+                        current, retry = {}, []
+                        for order_id in chunk:
+                            results[order_id] = {'status': 'error', 'name': before[order_id]['name'],
+                                                 'error': f"Resultado desconocido, revisar en Odoo: {e}"}
+                    applied = [order_id for order_id in chunk if order_id in current and
+                               set(current[order_id]['invoice_ids']) - set(before[order_id]['invoice_ids'])]
+                    processed += applied
+                    retry = [order_id for order_id in retry if order_id not in applied]
+                if retry:
+                    print("🔁 Facturando orden por orden...")
+                for order_id in retry:
+                    try:
+                        self.run_invoice_wizard([order_id])
+                        processed.append(order_id)
+                    except Exception as e_order:
+                        results[order_id] = {'status': 'error', 'name': before[order_id]['name'],
+                                             'error': str(e_order) if was_rejected(e_order) else
+                                             f"Resultado desconocido, revisar en Odoo: {e_order}"}
+            print(f"🧾 Wizard ejecutado para {min(start + chunk_size, len(eligible))}/{len(eligible)} órdenes")
+        
+        if processed:
+            after = self.read_records('sale.order', processed, ['invoice_ids', 'invoice_status'])
+            created = {order_id: [inv for inv in after[order_id]['invoice_ids']
+                                  if inv not in before[order_id]['invoice_ids']]
+                       for order_id in processed}
+            try:
+                invoices = self.read_records('account.move',
+                                             sorted({inv for ids in created.values() for inv in ids}),
+                                             ['name', 'state', 'amount_total', 'invoice_origin'])
+            except Exception:
+                invoices = {}
+            for order_id in processed:
+                results[order_id] = {
+                    'status': 'invoiced' if created[order_id] else 'error',
+                    'name': before[order_id]['name'],
+                    'invoice_status': after[order_id]['invoice_status'],
+                    'invoices': [invoices.get(inv, {'id': inv}) for inv in created[order_id]],
+                }
+                if not created[order_id]:
+                    results[order_id]['error'] = "El wizard no generó facturas para la orden"
+        
+        counts = Counter(result['status'] for result in results.values())
+        print(f"📊 Facturación masiva: {counts['invoiced']} facturadas, {counts['skipped']} omitidas, "
+              f"{counts['error']} con error, {counts['not_found']} inexistentes")
+        return {order_id: results[order_id] for order_id in order_ids}
+    
     def create_invoice(self, order_id):
         """Crear factura desde orden de venta usando el flujo nativo de Odoo"""
         try:
@@ -641,21 +1924,9 @@ class OdooConnector:
             
             # Método 1: Usar el wizard nativo de facturación de Odoo
             try:
-                # Crear el wizard de advance payment con contexto correcto
-                wizard_vals = {
-                    'advance_payment_method': 'delivered',  # Facturar productos entregados
-                    'deduct_down_payments': True,
-                }
-                
-                # Crear el wizard con contexto de la orden activa
-                wizard_id = self.execute('sale.advance.payment.inv', 'with_context', 
-                                       {'active_ids': [order_id], 'active_model': 'sale.order'},
-                                       'create', wizard_vals)
+                wizard_id = self.run_invoice_wizard([order_id])
                 
                 if wizard_id:
-                    # Ejecutar la creación de facturas
-                    result = self.execute('sale.advance.payment.inv', 'create_invoices', [wizard_id])
-                    
                     # Verificar si se creó la factura
                     updated_order = self.execute('sale.order', 'read', [order_id], ['invoice_ids'])[0]
                     if updated_order['invoice_ids']:
@@ -663,12 +1934,12 @@ class OdooConnector:
                         print(f"✅ Factura creada exitosamente desde pedido de venta")
                         print(f"   Factura(s) ID: {invoice_ids}")
                         
-                        # Mostrar detalles de la factura creada
+                        # Mostrar detalles de las facturas (una sola lectura)
+                        invoices = self.read_records('account.move', invoice_ids,
+                                                     ['name', 'state', 'amount_total', 'invoice_origin'])
                         for inv_id in invoice_ids:
-                            invoice = self.execute('account.move', 'read', [inv_id], 
-                                                 ['name', 'state', 'amount_total', 'invoice_origin'])
-                            if invoice:
-                                inv_data = invoice[0]
+                            inv_data = invoices.get(inv_id)
+                            if inv_data:
                                 print(f"   Número: {inv_data['name']}")
                                 print(f"   Estado: {inv_data['state']}")
                                 print(f"   Origen: {inv_data.get('invoice_origin', 'N/A')}")
@@ -690,12 +1961,40 @@ class OdooConnector:
     def get_model_fields(self, model_name):
         """Obtener campos disponibles de un modelo"""
         try:
-            fields = self.execute(model_name, 'fields_get', [])
-            return list(fields.keys())
+            return list(self.get_fields_info(model_name).keys())
         except Exception as e:
             print(f"Error obteniendo campos de {model_name}: {e}")
             return []
     
+    def get_fields_info(self, model_name, attributes=('type',)):
+        """Obtener fields_get de un modelo pidiendo solo los atributos necesarios
+
+        Usa la caché de metadatos en disco; solo consulta a Odoo si la entrada
+        no existe, caducó o cambiaron las versiones de los módulos instalados.
+        """
+        attributes = list(attributes)
+        if self.metadata_cache is None:
+            return self.execute(model_name, 'fields_get', [], attributes=attributes)
+        
+        self.check_module_versions()
+        fields = self.metadata_cache.get(self.url, self.db, model_name, attributes)
+        if fields is None:
+            fields = self.execute(model_name, 'fields_get', [], attributes=attributes)
+            self.metadata_cache.set(self.url, self.db, model_name, attributes, fields)
+        return fields
+    
+    def check_module_versions(self, force=False):
+        """Invalidar la caché de metadatos si cambiaron los módulos instalados"""
+        if self.metadata_cache is None:
+            return
+        if not force and not self.metadata_cache.needs_module_check(self.url, self.db):
+            return
+        modules = self.execute('ir.module.module', 'search_read',
+                               [['state', '=', 'installed']],
+                               fields=['name', 'latest_version'])
+        if self.metadata_cache.update_module_fingerprint(self.url, self.db, modules):
+            print("🔄 Cambiaron los módulos instalados: caché de metadatos invalidada")
+    
     def diagnose_system(self):
         """Diagnosticar sistema Odoo"""
         print("\n🔍 DIAGNÓSTICO DEL SISTEMA:")
@@ -714,6 +2013,21 @@ class OdooConnector:
         sale_related = [f for f in product_fields if 'sale' in f.lower()]
         if sale_related:
             print(f"Campos relacionados con ventas: {sale_related}")
+        
+        # Estadísticas de conexión HTTP
+        stats = self.get_transport_stats()
+        print(f"Peticiones HTTP: {stats.get('requests', 0)} - "
+              f"Conexiones abiertas: {stats.get('connections_opened', 0)} - "
+              f"Reutilizadas: {stats.get('connections_reused', 0)}")
+        print(f"Bytes enviados: {stats.get('request_bytes_wire', 0)} - "
+              f"Recibidos: {stats.get('response_bytes_wire', 0)} - "
+              f"Ahorrados por gzip: {stats.get('bytes_saved', 0)}")
+        print(f"Reintentos: {stats.get('retries', 0)} - "
+              f"Llamadas abandonadas: {stats.get('gave_up', 0)} - "
+              f"Aperturas del circuit breaker: {stats.get('breaker_opened', 0)}")
+        print(f"PDFs ya presentes en el almacén local: {self.stats['pdf_store_hits']}")
+        print(f"PDFs descargados: {self.stats['attachment_bodies_fetched']} - "
+              f"Bytes de PDF no transferidos: {self.attachment_bytes_avoided()}")
             
         print("-" * 40)
     
@@ -733,14 +2047,16 @@ class OdooConnector:
                 # Verificar facturas existentes
                 if order_data.get('invoice_ids'):
                     print(f"  Facturas asociadas: {len(order_data['invoice_ids'])}")
+                    try:
+                        invoices = self.read_records('account.move', order_data['invoice_ids'],
+                                                     ['name', 'state', 'amount_total'])
+                    except Exception:
+                        invoices = {}
                     for invoice_id in order_data['invoice_ids']:
-                        try:
-                            invoice = self.execute('account.move', 'read', [invoice_id], 
-                                                 ['name', 'state', 'amount_total'])
-                            if invoice:
-                                inv_data = invoice[0]
-                                print(f"    - Factura {inv_data['name']}: {inv_data['state']} - ${inv_data['amount_total']}")
-                        except Exception:
+                        inv_data = invoices.get(invoice_id)
+                        if inv_data:
+                            print(f"    - Factura {inv_data['name']}: {inv_data['state']} - ${inv_data['amount_total']}")
+                        else:
                             print(f"    - Factura ID {invoice_id}: (no se pudo leer)")
                     
                     print(f"  💡 Usa la opción 10 para descargar los PDFs de las facturas")
@@ -753,13 +2069,13 @@ class OdooConnector:
             print(f"Error obteniendo info de orden: {e}")
             return None
 
-def load_sample_data():
+def load_sample_data(path='sample_data.json'):
     """Cargar datos de ejemplo desde JSON"""
     try:
-        with open('sample_data.json', 'r', encoding='utf-8') as f:
+        with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
-        print("❌ Archivo sample_data.json no encontrado")
+        print(f"❌ Archivo {path} no encontrado")
         return None
     except json.JSONDecodeError as e:
         print(f"❌ Error leyendo JSON: {e}")
@@ -784,8 +2100,8 @@ def show_menu():
     print("0. Salir")
     print("="*50)
 
-def main():
-    """Función principal"""
+def interactive_menu():
+    """Menú interactivo"""
     print("🚀 Iniciando conexión con Odoo...")
     
     # Conectar con Odoo
@@ -803,20 +2119,24 @@ def main():
     while True:
         show_menu()
         choice = input("\n👉 Selecciona una opción: ").strip()
+        odoo.phase = f"opción {choice}"
         
         if choice == '0':
             print("👋 ¡Hasta luego!")
+            odoo.close()
             break
             
         elif choice == '1':
+            query = input("🔎 Buscar (Enter para listar): ").strip()
             print("\n📋 CLIENTES DISPONIBLES:")
-            customers = odoo.search_customers()
+            customers = odoo.search_customers(query=query)
             for customer in customers:
                 print(f"  ID: {customer['id']} - {customer['name']} - {customer.get('email', 'Sin email')}")
                 
         elif choice == '2':
+            query = input("🔎 Buscar (Enter para listar): ").strip()
             print("\n📦 PRODUCTOS DISPONIBLES:")
-            products = odoo.search_products()
+            products = odoo.search_products(query=query)
             for product in products:
                 print(f"  ID: {product['id']} - {product['name']} - ${product['list_price']} - Código: {product.get('default_code', 'N/A')}")
                 
@@ -939,5 +2259,269 @@ def main():
         
         input("\n⏸️  Presiona Enter para continuar...")
 
+def read_ids_file(path):
+    """Leer IDs (uno por línea) de un archivo o de stdin con '-'"""
+    if not path:
+        return []
+    if path == '-':
+        lines = sys.stdin.read().split()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split()
+    return [int(line) for line in lines]
+
+def build_parser():
+    """Definir los subcomandos de la línea de comandos"""
+    parser = argparse.ArgumentParser(
+        description="Operar Odoo desde la consola. Sin argumentos abre el menú interactivo.")
+    parser.add_argument('--timings', action='store_true',
+                        help="incluir tiempos de arranque y de ejecución en la salida")
+    parser.add_argument('--no-auth-cache', action='store_true',
+                        help="autenticar siempre contra el servidor")
+    parser.add_argument('--no-daemon', action='store_true',
+                        help="no usar el daemon local aunque esté activo")
+    parser.add_argument('--targets', metavar='PERFILES',
+                        help="ejecutar el subcomando en todos los destinos del archivo de perfiles (JSON)")
+    parser.add_argument('--only', help="con --targets, solo estos destinos (nombres separados por comas)")
+    parser.add_argument('--target-processes', type=int,
+                        help="con --targets, procesos simultáneos (ODOO_TARGET_PROCESSES, por defecto uno por destino)")
+    groups = parser.add_subparsers(dest='group', required=True)
+    
+    groups.add_parser('menu', help="menú interactivo")
+    
+    daemon = groups.add_parser('daemon', help="daemon local con conexión caliente").add_subparsers(
+        dest='action', required=True)
+    daemon.add_parser('start', help="arrancar el daemon en primer plano")
+    daemon.add_parser('stop', help="detener el daemon")
+    daemon.add_parser('status', help="estado y estadísticas del daemon")
+    
+    partners = groups.add_parser('partners', help="clientes").add_subparsers(dest='action', required=True)
+    partners_list = partners.add_parser('list', help="listar clientes")
+    partners_list.add_argument('--limit', type=int, default=10)
+    partners_list.add_argument('--query', help="texto a buscar en nombre o email")
+    
+    products = groups.add_parser('products', help="productos").add_subparsers(dest='action', required=True)
+    products_list = products.add_parser('list', help="listar productos")
+    products_list.add_argument('--limit', type=int, default=10)
+    products_list.add_argument('--query', help="texto a buscar en nombre o referencia interna")
+    
+    mirror = groups.add_parser('mirror', help="réplica local de clientes y productos").add_subparsers(
+        dest='action', required=True)
+    mirror_sync = mirror.add_parser('sync', help="sincronizar la réplica (incremental)")
+    mirror_sync.add_argument('--full', action='store_true', help="descartar la réplica y traer todo")
+    
+    types = groups.add_parser('types', help="tipos de pedido").add_subparsers(dest='action', required=True)
+    types.add_parser('list', help="listar tipos de pedido de venta")
+    
+    orders = groups.add_parser('orders', help="órdenes de venta").add_subparsers(dest='action', required=True)
+    orders_create = orders.add_parser('create', help="crear orden desde un JSON como sample_data.json")
+    orders_create.add_argument('--data', default='sample_data.json')
+    orders_create.add_argument('--type-id', type=int)
+    orders_import = orders.add_parser('import', help="crear órdenes desde un archivo JSONL o CSV, por bloques")
+    orders_import.add_argument('file')
+    orders_import.add_argument('--format', choices=['jsonl', 'csv'], help="por defecto según la extensión")
+    orders_import.add_argument('--chunk-size', type=int)
+    orders_import.add_argument('--type-id', type=int, help="tipo de pedido para las filas sin type_id")
+    orders_run = orders.add_parser('run', help="carga reanudable: crear, confirmar y descargar PDFs desde un archivo")
+    orders_run.add_argument('file')
+    orders_run.add_argument('--format', choices=['jsonl', 'csv'], help="por defecto según la extensión")
+    orders_run.add_argument('--chunk-size', type=int)
+    orders_run.add_argument('--type-id', type=int, help="tipo de pedido para las filas sin type_id")
+    orders_run.add_argument('--no-download', action='store_true', help="solo crear y confirmar")
+    orders_run.add_argument('--max-wait', type=int, default=30)
+    orders_run.add_argument('--journal', help="archivo del diario (por defecto ODOO_JOURNAL)")
+    orders_confirm = orders.add_parser('confirm', help="confirmar orden")
+    orders_confirm.add_argument('order_id', type=int)
+    orders_confirm_many = orders.add_parser('confirm-many', help="confirmar muchas órdenes por bloques")
+    orders_confirm_many.add_argument('order_ids', type=int, nargs='*')
+    orders_confirm_many.add_argument('--ids-file', help="archivo con un ID de orden por línea ('-' = stdin)")
+    orders_confirm_many.add_argument('--chunk-size', type=int)
+    orders_invoice = orders.add_parser('invoice', help="crear factura desde orden (manual)")
+    orders_invoice.add_argument('order_id', type=int)
+    orders_invoice_many = orders.add_parser('invoice-many', help="facturar muchas órdenes confirmadas por bloques")
+    orders_invoice_many.add_argument('order_ids', type=int, nargs='*')
+    orders_invoice_many.add_argument('--ids-file', help="archivo con un ID de orden por línea ('-' = stdin)")
+    orders_invoice_many.add_argument('--chunk-size', type=int)
+    orders_info = orders.add_parser('info', help="ver información de orden")
+    orders_info.add_argument('order_id', type=int)
+    
+    invoices = groups.add_parser('invoices', help="facturas").add_subparsers(dest='action', required=True)
+    invoices_pdf = invoices.add_parser('pdf', help="descargar los PDFs de las facturas de una orden")
+    invoices_pdf.add_argument('order_id', type=int)
+    invoices_pdf.add_argument('--max-wait', type=int, default=30)
+    invoices_pdf.add_argument('--workers', type=int, help="descargas simultáneas (ODOO_DOWNLOAD_WORKERS)")
+    invoices_pdf_many = invoices.add_parser('pdf-many', help="descargar en paralelo los PDFs de muchas órdenes")
+    invoices_pdf_many.add_argument('order_ids', type=int, nargs='*')
+    invoices_pdf_many.add_argument('--ids-file', help="archivo con un ID de orden por línea ('-' = stdin)")
+    invoices_pdf_many.add_argument('--max-wait', type=int, default=30)
+    invoices_pdf_many.add_argument('--workers', type=int, help="descargas simultáneas (ODOO_DOWNLOAD_WORKERS)")
+    
+    return parser
+
+def run_command(odoo, args):
+    """Ejecutar un subcomando y devolver (ok, resultado serializable en JSON)"""
+    command = (args.group, args.action)
+    
+    if command == ('partners', 'list'):
+        return True, odoo.search_customers(limit=args.limit, query=args.query)
+    if command == ('products', 'list'):
+        return True, odoo.search_products(limit=args.limit, query=args.query)
+    if command == ('mirror', 'sync'):
+        if odoo.mirror is None:
+            return False, "La réplica local está desactivada (ODOO_MIRROR=0)"
+        return True, [odoo.sync_mirror(model, full=args.full) for model in MIRROR_FIELDS]
+    if command == ('types', 'list'):
+        return True, odoo.search_sale_order_types()
+    if command == ('orders', 'create'):
+        data = load_sample_data(args.data)
+        if not data:
+            return False, None
+        order_id = odoo.create_sale_order_with_type(data.get('sale_order', data), args.type_id)
+        return order_id is not None, order_id
+    if command == ('orders', 'import'):
+        results = odoo.import_sale_orders(args.file, fmt=args.format, chunk_size=args.chunk_size,
+                                          order_type_id=args.type_id)
+        return all(r['status'] == 'created' for r in results.values()), results
+    if command == ('orders', 'run'):
+        results = odoo.run_batch(args.file, fmt=args.format, chunk_size=args.chunk_size, order_type_id=args.type_id,
+                                 download=not args.no_download, max_wait=args.max_wait, journal_path=args.journal)
+        last_step = 'confirmed' if args.no_download else 'downloaded'
+        return all(r['step'] == last_step for r in results.values()), results
+    if command == ('orders', 'confirm'):
+        return odoo.confirm_sale_order(args.order_id), args.order_id
+    if command == ('orders', 'confirm-many'):
+        order_ids = list(args.order_ids) + read_ids_file(args.ids_file)
+        results = odoo.confirm_sale_orders(order_ids, chunk_size=args.chunk_size)
+        return all(r['status'] in ('confirmed', 'skipped') for r in results.values()), results
+    if command == ('orders', 'invoice'):
+        invoice_id = odoo.create_invoice(args.order_id)
+        return invoice_id is not None, invoice_id
+    if command == ('orders', 'invoice-many'):
+        order_ids = list(args.order_ids) + read_ids_file(args.ids_file)
+        results = odoo.invoice_sale_orders(order_ids, chunk_size=args.chunk_size)
+        return all(r['status'] in ('invoiced', 'skipped') for r in results.values()), results
+    if command == ('orders', 'info'):
+        order = odoo.get_order_info(args.order_id)
+        return order is not None, order
+    if command == ('invoices', 'pdf'):
+        files = odoo.download_order_invoices(args.order_id, max_wait=args.max_wait, workers=args.workers)
+        return bool(files), files
+    if command == ('invoices', 'pdf-many'):
+        order_ids = list(args.order_ids) + read_ids_file(args.ids_file)
+        results = odoo.download_invoices(order_ids, max_wait=args.max_wait, workers=args.workers)
+        return bool(results) and all(r['filename'] for r in results.values()), results
+    raise ValueError(f"Subcomando no soportado: {' '.join(command)}")
+
+def run_cli_command(odoo, args, started_at):
+    """Ejecutar un subcomando con un conector ya conectado y armar la salida JSON"""
+    output = {'ok': False, 'result': None}
+    ready_at = time.perf_counter()
+    try:
+        with odoo.rpc_phase(f"{args.group} {args.action}"):
+            try:
+                output['ok'], output['result'] = run_command(odoo, args)
+            except xmlrpc.client.Fault as e:
+                # El uid cacheado puede haber dejado de ser válido: autenticar y reintentar
+                if odoo.auth_source != 'cache' or 'access' not in str(e).lower():
+                    raise
+                odoo.forget_cached_session()
+                if not odoo.connect(use_cache=not args.no_auth_cache):
+                    raise
+                output['ok'], output['result'] = run_command(odoo, args)
+    except Exception as e:
+        output['error'] = str(e)
+    
+    if args.timings:
+        output['timings'] = {
+            'startup_ms': round((ready_at - started_at) * 1000, 1),
+            'command_ms': round((time.perf_counter() - ready_at) * 1000, 1),
+            'auth': odoo.auth_source,
+            'rpc_calls': odoo.stats['rpc_calls'],
+        }
+    return output
+
+def daemon_command(args):
+    """Subcomandos `daemon start|stop|status`"""
+    if args.action == 'start':
+        with contextlib.redirect_stdout(sys.stderr):
+            return 0 if odoo_daemon.serve() else 1
+    
+    reply = odoo_daemon.send_request({'control': 'stop' if args.action == 'stop' else 'ping'}, timeout=5)
+    if reply is None:
+        print(json.dumps({'ok': False, 'error': "No hay daemon activo"}, ensure_ascii=False))
+        return 1
+    if args.action == 'status':
+        reply.update(odoo_daemon.send_request({'control': 'stats'}, timeout=5) or {})
+    print(json.dumps(reply, ensure_ascii=False, default=str))
+    return 0
+
+def targets_command(args, argv):
+    """Ejecutar el subcomando en todos los destinos del archivo de perfiles e imprimir el informe combinado"""
+    if getattr(args, 'ids_file', None) == '-':
+        output = {'ok': False, 'result': None, 'error': "--ids-file - no se puede repartir entre destinos"}
+    else:
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                only = [name.strip() for name in args.only.split(',') if name.strip()] if args.only else None
+                targets = odoo_targets.load_targets(args.targets, only)
+                output = odoo_targets.run_targets(targets, argv, processes=args.target_processes)
+            except (OSError, ValueError) as e:
+                output = {'ok': False, 'result': None, 'error': str(e)}
+    print(json.dumps(output, ensure_ascii=False, default=str))
+    return 0 if output['ok'] else 1
+
+def cli(argv):
+    """Ejecutar un subcomando sin interacción e imprimir el resultado en JSON
+
+    Los mensajes de progreso van a stderr; stdout solo contiene el JSON. Si
+    hay un daemon local activo, el subcomando se le reenvía y se aprovecha
+    su conexión ya autenticada.
+    """
+    args = build_parser().parse_args(argv)
+    if args.group == 'menu':
+        return interactive_menu()
+    if args.group == 'daemon':
+        return daemon_command(args)
+    if args.targets:
+        return targets_command(args, argv)
+    
+    # Con --ids-file - el stdin es de este proceso, no del daemon
+    if not args.no_daemon and getattr(args, 'ids_file', None) != '-':
+        # El daemon comprueba que atiende al mismo servidor, base y usuario que este entorno
+        reply = odoo_daemon.send_request({
+            'argv': argv, 'cwd': os.getcwd(),
+            'server': server_key(os.getenv('ODOO_URL'), os.getenv('ODOO_DB')),
+            'username': os.getenv('ODOO_USERNAME'),
+        })
+        if reply is not None and 'refused' in reply:
+            sys.stderr.write(f"⚠️ Daemon no usado: {reply['refused']}\n")
+        elif reply is not None:
+            sys.stderr.write(reply.get('log', ''))
+            output = reply['output']
+            print(json.dumps(output, ensure_ascii=False, default=str))
+            return 0 if output['ok'] else 1
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        odoo = OdooConnector()
+        try:
+            if odoo.connect(use_cache=not args.no_auth_cache):
+                output = run_cli_command(odoo, args, STARTED_AT)
+            else:
+                output = {'ok': False, 'result': None, 'error': "No se pudo conectar con Odoo"}
+        finally:
+            odoo.close()
+    
+    print(json.dumps(output, ensure_ascii=False, default=str))
+    return 0 if output['ok'] else 1
+
+def main(argv=None):
+    """Función principal: menú interactivo sin argumentos, subcomando en otro caso"""
+    # Antes de cualquier lectura del entorno: socket del daemon, caché, perfiles de destinos
+    load_dotenv()
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return interactive_menu()
+    return cli(argv)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Daemon local que mantiene un OdooConnector autenticado y caliente
+
+Escucha en un socket Unix. Las invocaciones cortas de la línea de comandos
+le reenvían sus argumentos en lugar de importar, autenticar y reconstruir
+cachés y conexiones en cada ejecución.
+
+Protocolo: una línea JSON por petición y una línea JSON por respuesta.
+    {"argv": [...], "cwd": "...", "server": "url|db", "username": "..."}
+        ->  {"output": {...}, "log": "..."}  o  {"refused": "..."}
+    {"control": "ping" | "stats" | "stop"}
+
+El daemon rechaza los subcomandos de un cliente configurado para otro
+servidor, base o usuario: con un socket compartido, una terminal de otra
+empresa no debe ejecutar nada en la base del daemon.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from odoo_cache import cache_dir, server_key
+from odoo_config import env_str
+
+
+def socket_path():
+    """Ruta del socket del daemon (ODOO_DAEMON_SOCKET, por defecto en el directorio de caché)"""
+    return env_str('ODOO_DAEMON_SOCKET') or os.path.join(cache_dir(), 'daemon.sock')
+
+
+def send_request(request, path=None, timeout=None):
+    """Enviar una petición al daemon; devuelve None si no hay daemon escuchando"""
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as reader:
+                line = reader.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        # Socket huérfano de un daemon que ya no está
+        return None
+    return json.loads(line) if line else None
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    """Ejecutar con otro directorio de trabajo (para guardar PDFs donde está el cliente)"""
+    previous = os.getcwd()
+    if path:
+        os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            reply = self.server.dispatch(json.loads(line))
+        except Exception as e:
+            reply = {'output': {'ok': False, 'result': None, 'error': str(e)}, 'log': ''}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False, default=str).encode('utf-8') + b'\n')
+
+
+class OdooDaemon(socketserver.ThreadingUnixStreamServer):
+    """Servidor del socket Unix con un único conector autenticado
+
+    Los subcomandos se ejecutan de a uno (ServerProxy no es seguro entre
+    hilos y la salida de cada comando se captura por separado).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, odoo):
+        self.odoo = odoo
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        # El socket nace ya con permisos 0600: un chmod después de bind deja una ventana abierta
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(path, DaemonHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def identity(self):
+        """Servidor, base y usuario del conector del daemon"""
+        return {'server': server_key(self.odoo.url, self.odoo.db), 'username': self.odoo.username}
+
+    def dispatch(self, request):
+        # Importación diferida: odoo_console importa este módulo
+        from odoo_console import build_parser, run_cli_command
+
+        control = request.get('control')
+        if control == 'ping':
+            return {'ok': True, 'pid': os.getpid(), 'requests': self.requests,
+                    'uptime_s': round(time.time() - self.started_at, 1)}
+        if control == 'stats':
+            return {'ok': True, 'connector': dict(self.odoo.stats),
+                    'transport': self.odoo.get_transport_stats()}
+        if control == 'stop':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'ok': True}
+
+        identity = self.identity()
+        if any(request.get(key) != value for key, value in identity.items()):
+            return {'refused': f"El daemon está conectado a {identity['server']} como {identity['username']}"}
+
+        started_at = time.perf_counter()
+        log = io.StringIO()
+        with self.lock:
+            self.requests += 1
+            with contextlib.redirect_stdout(log), working_directory(request.get('cwd')):
+                try:
+                    args = build_parser().parse_args(request['argv'])
+                except SystemExit:
+                    return {'output': {'ok': False, 'result': None, 'error': "Argumentos no válidos"},
+                            'log': log.getvalue()}
+                output = run_cli_command(self.odoo, args, started_at)
+        if 'timings' in output:
+            output['timings']['via'] = 'daemon'
+        return {'output': output, 'log': log.getvalue()}
+
+
+def serve(path=None):
+    """Arrancar el daemon en primer plano hasta recibir 'stop' o Ctrl+C"""
+    from odoo_console import OdooConnector
+
+    path = path or socket_path()
+    if send_request({'control': 'ping'}, path, timeout=2):
+        print(f"ℹ️ Ya hay un daemon escuchando en {path}")
+        return False
+    if os.path.exists(path):
+        os.unlink(path)
+
+    odoo = OdooConnector()
+    if not odoo.connect(use_cache=True):
+        return False
+
+    server = OdooDaemon(path, odoo)
+    print(f"🟢 Daemon escuchando en {path} (PID {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        odoo.close()
+        print("🔴 Daemon detenido")
+    return True
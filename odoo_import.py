@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura de órdenes de venta desde archivos JSONL o CSV grandes
+
+Las filas se leen de a una y se agrupan en órdenes por `order_ref`, sin
+cargar el archivo en memoria. Cada fila conserva su número de línea para
+poder atribuirle los errores.
+
+Formato de cada fila (una línea de pedido):
+    order_ref, customer_id, product_id, quantity, price[, type_id]
+En JSONL una fila también puede traer la orden completa, con la misma forma
+que `sale_order` en sample_data.json más su `order_ref`.
+"""
+
+import csv
+import json
+
+ORDER_COLUMNS = ('order_ref', 'customer_id', 'product_id', 'quantity', 'price', 'type_id')
+
+
+def detect_format(path):
+    """Formato según la extensión: 'csv' o 'jsonl'"""
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(path, fmt=None):
+    """Recorrer las filas del archivo: (número de línea, dict) o (número de línea, error)"""
+    fmt = fmt or detect_format(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            missing = [c for c in ORDER_COLUMNS[:4] if c not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+            for row in reader:
+                # Vacíos del CSV como ausentes, igual que en JSONL
+                yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, '')}
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_no, f"JSON inválido: {e}"
+                    continue
+                yield line_no, row if isinstance(row, dict) else "Se esperaba un objeto JSON"
+
+
+def as_number(row, field, cast, default=None):
+    value = row.get(field, default)
+    if value is None:
+        raise ValueError(f"Falta '{field}'")
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{field}' no es válido: {value!r}")
+
+
+def parse_row(row):
+    """Validar una fila y devolver (order_ref, customer_id, type_id, líneas); lanza ValueError"""
+    order_ref = str(row.get('order_ref') or '').strip()
+    if not order_ref:
+        raise ValueError("Falta 'order_ref'")
+    customer_id = as_number(row, 'customer_id', int)
+    type_id = as_number(row, 'type_id', int) if row.get('type_id') is not None else None
+
+    lines = row['products'] if isinstance(row.get('products'), list) else [row]
+    if not lines:
+        raise ValueError("La orden no tiene líneas")
+    products = [{
+        'product_id': as_number(line, 'product_id', int),
+        'quantity': as_number(line, 'quantity', float),
+        'price': as_number(line, 'price', float, 0),
+    } for line in lines]
+    return order_ref, customer_id, type_id, products
+
+
+def group_orders(rows):
+    """Agrupar filas consecutivas con el mismo order_ref en órdenes
+
+    Entrega dicts con key (clave única para los resultados), order_ref,
+    customer_id, type_id, products (cada línea con su `row`), rows (números
+    de línea) y errors ([{'row', 'error'}]).
+    Una fila inválida deja su orden con errores; una fila sin order_ref
+    legible forma una orden propia `fila <n>`. Las filas de una misma orden
+    deben ser consecutivas: si un order_ref reaparece más adelante, esas
+    filas se rechazan.
+    """
+    current = None
+    seen = set()
+    for line_no, row in rows:
+        if isinstance(row, str):
+            error, order_ref = row, None
+        else:
+            error = None
+            try:
+                order_ref, customer_id, type_id, products = parse_row(row)
+            except ValueError as e:
+                error = str(e)
+                order_ref = str(row.get('order_ref') or '').strip() or None
+
+        if order_ref is None:
+            if current is not None:
+                yield current
+                current = None
+            yield {'key': f"fila {line_no}", 'order_ref': None, 'customer_id': None, 'type_id': None,
+                   'products': [], 'rows': [line_no], 'errors': [{'row': line_no, 'error': error}]}
+            continue
+
+        if current is None or current['order_ref'] != order_ref:
+            if current is not None:
+                yield current
+            current = {'key': order_ref, 'order_ref': order_ref, 'customer_id': None, 'type_id': None,
+                       'products': [], 'rows': [], 'errors': []}
+            if order_ref in seen:
+                current['key'] = f"{order_ref} (fila {line_no})"
+                error = error or (f"order_ref {order_ref} ya apareció antes: "
+                                  f"las filas de una orden deben ser consecutivas")
+            seen.add(order_ref)
+
+        current['rows'].append(line_no)
+        if error is None and current['customer_id'] not in (None, customer_id):
+            error = f"customer_id {customer_id} distinto del de la orden ({current['customer_id']})"
+        if error is not None:
+            current['errors'].append({'row': line_no, 'error': error})
+            continue
+        current['customer_id'] = customer_id
+        current['type_id'] = current['type_id'] or type_id
+        current['products'].extend(dict(line, row=line_no) for line in products)
+
+    if current is not None:
+        yield current
+
+
+def chunked(items, size):
+    """Agrupar un iterable en listas de hasta `size` elementos"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
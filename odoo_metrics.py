@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentación de llamadas RPC: latencia, bytes y errores por modelo.método
+"""
+
+import atexit
+import json
+import math
+import sys
+import threading
+from collections import defaultdict
+
+from odoo_config import env_flag, env_float, env_str
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    # Rango = ceil(p·n): round() redondea .5 al par y la mediana de 5 valores daría el 2.º
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class RpcRecorder:
+    """Hook de OdooConnector que registra cada llamada RPC
+
+    Cada evento es un dict con model, method, phase, elapsed_ms,
+    request_bytes, response_bytes y error. Opcionalmente avisa en stderr de
+    las llamadas más lentas que `slow_ms` y exporta los eventos como JSON
+    lines en `log_path`. Los eventos solo se guardan en memoria para el
+    resumen con `keep_events`: en un proceso largo (el daemon) avisar de las
+    lentas o exportarlas no debe acumular nada.
+    """
+
+    def __init__(self, slow_ms=None, log_path=None, keep_events=True):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self.keep_events = keep_events
+        self.events = []
+        self._lock = threading.Lock()
+        self._log_file = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def __call__(self, event):
+        with self._lock:
+            if self.keep_events:
+                self.events.append(event)
+            if self._log_file:
+                self._log_file.write(json.dumps(event, ensure_ascii=False) + '\n')
+                self._log_file.flush()
+        if self.slow_ms is not None and event['elapsed_ms'] >= self.slow_ms:
+            status = f" ❌ {event['error']}" if event['error'] else ""
+            print(f"🐢 RPC lenta: {event['model']}.{event['method']} "
+                  f"{event['elapsed_ms']:.0f} ms ({event['response_bytes']} bytes){status}",
+                  file=sys.stderr)
+
+    def _group(self, key):
+        groups = defaultdict(list)
+        with self._lock:
+            for event in self.events:
+                groups[key(event)].append(event)
+        return groups
+
+    def summary(self):
+        """Filas de resumen por modelo.método, ordenadas por tiempo total"""
+        rows = []
+        for name, events in self._group(lambda e: f"{e['model']}.{e['method']}").items():
+            latencies = sorted(e['elapsed_ms'] for e in events)
+            rows.append({
+                'rpc': name,
+                'calls': len(events),
+                'errors': sum(1 for e in events if e['error']),
+                'total_ms': sum(latencies),
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+                'request_bytes': sum(e['request_bytes'] for e in events),
+                'response_bytes': sum(e['response_bytes'] for e in events),
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def phase_summary(self):
+        """Tiempo total y llamadas por fase del flujo (orden, confirmación, PDF...)"""
+        return sorted(
+            ({'phase': phase, 'calls': len(events), 'total_ms': sum(e['elapsed_ms'] for e in events)}
+             for phase, events in self._group(lambda e: e.get('phase') or '-').items()),
+            key=lambda row: row['total_ms'], reverse=True)
+
+    def print_summary(self, file=None):
+        """Imprimir la tabla de resumen (por defecto en stderr)"""
+        file = file or sys.stderr
+        rows = self.summary()
+        if not rows:
+            return
+        print("\n📊 RESUMEN DE LLAMADAS RPC", file=file)
+        print(f"{'modelo.método':<44} {'llam.':>6} {'err.':>5} {'total ms':>10} {'p50':>8} "
+              f"{'p95':>8} {'p99':>8} {'enviado':>10} {'recibido':>11}", file=file)
+        print("-" * 118, file=file)
+        for row in rows:
+            print(f"{row['rpc'][:44]:<44} {row['calls']:>6} {row['errors']:>5} {row['total_ms']:>10.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                  f"{row['request_bytes']:>10} {row['response_bytes']:>11}", file=file)
+
+        phases = self.phase_summary()
+        if len(phases) > 1 or phases[0]['phase'] != '-':
+            print("\n⏱️ Tiempo por fase:", file=file)
+            for row in phases:
+                print(f"   {row['phase']:<30} {row['calls']:>6} llamadas {row['total_ms']:>10.1f} ms", file=file)
+
+    def close(self):
+        with self._lock:
+            if self._log_file:
+                self._log_file.close()
+                self._log_file = None
+
+
+def recorder_from_env():
+    """Registro compartido según el .env (None si la instrumentación está apagada)
+
+    ODOO_PROFILE=1 imprime el resumen al salir, ODOO_SLOW_RPC_MS avisa de
+    llamadas lentas y ODOO_RPC_LOG exporta los eventos en JSON lines.
+    Cualquiera de las tres opciones activa el registro.
+    """
+    global _recorder
+    profile = env_flag('ODOO_PROFILE', False)
+    slow_ms = env_float('ODOO_SLOW_RPC_MS', None)
+    log_path = env_str('ODOO_RPC_LOG')
+    if not (profile or slow_ms is not None or log_path):
+        return None
+
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = RpcRecorder(slow_ms=slow_ms, log_path=log_path, keep_events=profile)
+            if profile:
+                atexit.register(_recorder.print_summary)
+            atexit.register(_recorder.close)
+        return _recorder
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Reintentos con backoff y circuit breaker para las llamadas RPC a Odoo
+"""
+
+import http.client
+import random
+import socket
+import threading
+import time
+import xmlrpc.client
+from collections import Counter, deque
+
+from odoo_config import env_flag, env_float, env_int
+
+# Métodos de solo lectura: repetirlos no cambia nada en el servidor
+READ_METHODS = frozenset({
+    'search', 'search_read', 'search_count', 'read', 'read_group', 'fields_get',
+    'name_search', 'name_get', 'default_get', 'check_access_rights', 'check_access_rule',
+    'render_qweb_pdf',
+})
+
+# Errores HTTP de un servidor saturado: 429/503 rechazan la petición sin procesarla,
+# tras 502/504 el worker de Odoo pudo haberla aplicado igualmente
+REJECTED_HTTP = (429, 503)
+TRANSIENT_HTTP = REJECTED_HTTP + (502, 504)
+
+# Mensajes de Odoo para transacciones revertidas por concurrencia (seguras de repetir)
+ROLLBACK_MESSAGES = ('could not serialize access', 'concurrent update', 'deadlock detected')
+
+
+def classify_error(error):
+    """Clasificar un error de una llamada RPC
+
+    Devuelve 'not_applied' si el servidor no aplicó la llamada (conexión
+    rechazada, 429/503, transacción revertida), 'unknown' si es un error
+    transitorio pero la llamada pudo haberse aplicado (conexión cortada,
+    timeout, 502/504) y None si no es transitorio.
+    """
+    if isinstance(error, ConnectionRefusedError):
+        return 'not_applied'
+    if isinstance(error, xmlrpc.client.ProtocolError):
+        if error.errcode in REJECTED_HTTP:
+            return 'not_applied'
+        return 'unknown' if error.errcode in TRANSIENT_HTTP else None
+    if isinstance(error, xmlrpc.client.Fault):
+        message = str(error.faultString).lower()
+        return 'not_applied' if any(m in message for m in ROLLBACK_MESSAGES) else None
+    if isinstance(error, (ConnectionError, socket.timeout, TimeoutError,
+                          http.client.IncompleteRead, http.client.BadStatusLine)):
+        return 'unknown'
+    return None
+
+
+def was_rejected(error):
+    """Si es seguro que Odoo no aplicó la llamada: la rechazó (Fault, con la
+    transacción revertida) o no llegó a procesarla
+
+    Ante un resultado desconocido (timeout, conexión cortada, 502/504) la
+    llamada pudo haberse aplicado y no debe repetirse sin comprobarlo antes.
+    """
+    return isinstance(error, xmlrpc.client.Fault) or classify_error(error) == 'not_applied'
+
+
+def retry_after(error):
+    """Segundos indicados por la cabecera Retry-After de un 429/503, si la hay"""
+    headers = getattr(error, 'headers', None)
+    try:
+        value = headers.get('Retry-After') if headers else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Pausa el envío de llamadas cuando la tasa de errores transitorios se dispara
+
+    Si en la ventana de `window` segundos hay al menos `min_calls` llamadas
+    y la proporción de fallos llega a `error_rate`, el circuito se abre: las
+    llamadas esperan `cooldown` segundos en vez de saturar más al servidor.
+    Después pasa una sola llamada de prueba; si funciona el circuito se
+    cierra y si falla vuelve a abrirse. Es compartido por todos los
+    conectores (y hilos) que hablan con el mismo servidor.
+    """
+
+    def __init__(self, window=30.0, min_calls=10, error_rate=0.5, cooldown=5.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.events = deque()  # (instante, falló)
+        self.open_until = 0.0
+        self.half_open = False
+        self.probing = False
+        self.condition = threading.Condition()
+        self.stats = Counter()
+
+    def before_call(self):
+        """Esperar mientras el circuito esté abierto o haya una prueba en curso"""
+        with self.condition:
+            paused = False
+            while True:
+                remaining = self.open_until - time.monotonic()
+                if remaining > 0:
+                    paused = True
+                    self.condition.wait(remaining)
+                elif self.half_open and self.probing:
+                    paused = True
+                    self.condition.wait(self.cooldown)
+                else:
+                    break
+            if self.half_open:
+                self.probing = True
+            if paused:
+                self.stats['paused_calls'] += 1
+
+    def record(self, failed):
+        """Registrar el resultado de una llamada"""
+        with self.condition:
+            now = time.monotonic()
+            if self.probing:
+                self.probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.half_open = False
+                    self.events.clear()
+                    print("🟢 Circuito cerrado: Odoo vuelve a responder")
+                self.condition.notify_all()
+                return
+
+            self.events.append((now, failed))
+            while self.events and self.events[0][0] < now - self.window:
+                self.events.popleft()
+            failures = sum(1 for _, f in self.events if f)
+            if (failed and len(self.events) >= self.min_calls
+                    and failures / len(self.events) >= self.error_rate):
+                self._open(now)
+
+    def _open(self, now):
+        self.open_until = now + self.cooldown
+        self.half_open = True
+        self.events.clear()
+        self.stats['opened'] += 1
+        print(f"⛔ Circuito abierto: demasiados errores de Odoo, pausa de {self.cooldown:.0f}s")
+
+    @classmethod
+    def from_env(cls):
+        """Crear el circuit breaker según el .env (None si está desactivado)"""
+        if not env_flag('ODOO_BREAKER', True):
+            return None
+        return cls(window=env_float('ODOO_BREAKER_WINDOW', 30.0),
+                   min_calls=env_int('ODOO_BREAKER_MIN_CALLS', 10),
+                   error_rate=env_float('ODOO_BREAKER_ERROR_RATE', 0.5),
+                   cooldown=env_float('ODOO_BREAKER_COOLDOWN', 5.0))
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial y jitter, según la idempotencia del método
+
+    Las lecturas se reintentan ante cualquier error transitorio. El resto
+    de métodos (create, write, action_confirm...) solo cuando es seguro que
+    el servidor no aplicó la llamada, para no duplicar registros.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=10.0, breaker=None):
+        self.attempts = max(0, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.stats = Counter()
+
+    @classmethod
+    def from_env(cls):
+        """Crear la política según el .env"""
+        return cls(attempts=env_int('ODOO_RETRY_ATTEMPTS', 3),
+                   base_delay=env_float('ODOO_RETRY_BASE_DELAY', 0.5),
+                   max_delay=env_float('ODOO_RETRY_MAX_DELAY', 10.0),
+                   breaker=CircuitBreaker.from_env())
+
+    def should_retry(self, method, error, attempt):
+        if attempt >= self.attempts:
+            return False
+        kind = classify_error(error)
+        return kind == 'not_applied' or (kind == 'unknown' and method in READ_METHODS)
+
+    def delay(self, attempt, error=None):
+        """Espera antes del reintento `attempt` (0 = primero)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        hinted = retry_after(error)
+        return min(self.max_delay, max(delay, hinted)) if hinted is not None else delay
+
+    def call(self, method, func, label=None):
+        """Ejecutar `func()` aplicando el circuit breaker y los reintentos"""
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                if self.breaker is not None:
+                    self.breaker.record(classify_error(e) is not None)
+                if not self.should_retry(method, e, attempt):
+                    if classify_error(e) is not None:
+                        self.stats['gave_up'] += 1
+                    raise
+                wait = self.delay(attempt, e)
+                attempt += 1
+                self.stats['retries'] += 1
+                print(f"🔁 Reintento {attempt}/{self.attempts} de {label or method} "
+                      f"en {wait:.1f}s: {e}")
+                time.sleep(wait)
+                continue
+            if self.breaker is not None:
+                self.breaker.record(False)
+            return result
+
+    def summary(self):
+        """Reintentos, llamadas abandonadas y actividad del circuit breaker"""
+        stats = dict(self.stats)
+        if self.breaker is not None:
+            stats.update({f"breaker_{k}": v for k, v in self.breaker.stats.items()})
+        return stats
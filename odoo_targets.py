@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Ejecución de un subcomando contra varias instancias o bases de Odoo a la vez
+
+Los destinos se listan en un archivo de perfiles JSON (opción --targets):
+
+    {"targets": [
+        {"name": "empresa_a", "url": "https://a.example.com", "db": "a",
+         "username": "api@a.example.com", "password_env": "ODOO_PASSWORD_A"},
+        {"name": "empresa_b", "url": "https://b.example.com", "db": "b",
+         "username": "api@b.example.com", "password": "...",
+         "dir": "datos/b", "env": {"ODOO_DOWNLOAD_WORKERS": "8"}}
+    ]}
+
+Cada destino corre en su propio proceso, con su conector, su pool HTTP y
+sus workers, dentro de su directorio de trabajo (`dir`, por defecto el
+nombre del destino). Las rutas relativas del subcomando, los PDFs
+descargados, la caché y el diario se resuelven ahí, así que cada empresa
+tiene sus propios archivos.
+
+Cada destino lleva sus credenciales: `username` y `password` o
+`password_env` (variable de entorno, que puede estar en el .env). Nunca se
+usan ODOO_USERNAME/ODOO_PASSWORD, que son las de la conexión por defecto.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from odoo_config import env_int
+from odoo_daemon import working_directory
+
+
+def load_targets(path, only=None):
+    """Leer y validar los destinos del archivo de perfiles; `only` filtra por nombre
+
+    El .env ya debe estar cargado: `password_env` se resuelve aquí.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    targets = data.get('targets') if isinstance(data, dict) else data
+    if not isinstance(targets, list) or not targets:
+        raise ValueError(f"{path} no define ningún destino en 'targets'")
+
+    names = set()
+    for target in targets:
+        name = target.get('name')
+        if not name or not target.get('url') or not target.get('db'):
+            raise ValueError(f"Cada destino necesita 'name', 'url' y 'db': {target}")
+        if name in names:
+            raise ValueError(f"Destino repetido: {name}")
+        names.add(name)
+        # Sin credenciales propias el conector usaría las del .env: otro usuario, quizá otra empresa
+        if not target.get('username'):
+            raise ValueError(f"El destino {name} necesita 'username'")
+        if not target.get('password'):
+            variable = target.get('password_env')
+            if not variable:
+                raise ValueError(f"El destino {name} necesita 'password' o 'password_env'")
+            target['password'] = os.getenv(variable)
+            if not target['password']:
+                raise ValueError(f"El destino {name}: la variable {variable} no está definida")
+
+    if only:
+        missing = set(only) - names
+        if missing:
+            raise ValueError(f"Destinos desconocidos: {', '.join(sorted(missing))}")
+        targets = [target for target in targets if target['name'] in only]
+    return targets
+
+
+class PrefixedWriter:
+    """Salida de un proceso hijo, línea a línea y con el nombre del destino delante"""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+        self.pending = ''
+
+    def write(self, text):
+        lines = (self.pending + text).split('\n')
+        self.pending = lines.pop()
+        for line in lines:
+            self.stream.write(f"{self.prefix}{line}\n")
+        return len(text)
+
+    def flush(self):
+        if self.pending:
+            self.stream.write(f"{self.prefix}{self.pending}\n")
+            self.pending = ''
+        self.stream.flush()
+
+
+def result_status(item):
+    """Estado de un elemento del resultado de un subcomando masivo"""
+    if 'status' in item:
+        return item['status']
+    if 'step' in item:
+        return item['step'] or 'rejected'
+    if 'filename' in item:
+        return 'downloaded' if item['filename'] else 'error'
+    return 'ok'
+
+
+def count_results(result):
+    """Contar los elementos de un resultado masivo por estado"""
+    if not isinstance(result, dict):
+        return Counter()
+    return Counter(result_status(item) for item in result.values() if isinstance(item, dict))
+
+
+def run_target(target, argv):
+    """Ejecutar el subcomando contra un destino (en un proceso hijo)"""
+    # Importación diferida: odoo_console importa este módulo
+    from odoo_console import OdooConnector, build_parser, run_cli_command
+
+    started_at = time.perf_counter()
+    workdir = target.get('dir') or target['name']
+    os.makedirs(workdir, exist_ok=True)
+    # Un mismo proceso puede atender varios destinos: el entorno se restaura al terminar
+    saved_env = dict(os.environ)
+    os.environ.update({key: str(value) for key, value in (target.get('env') or {}).items()})
+    if 'ODOO_CACHE_DIR' not in (target.get('env') or {}):
+        # Caché, réplica y diario propios del destino, dentro de su directorio
+        os.environ['ODOO_CACHE_DIR'] = '.odoo_cache'
+
+    output = {'ok': False, 'result': None}
+    writer = PrefixedWriter(f"[{target['name']}] ", sys.stderr)
+    with contextlib.redirect_stdout(writer), working_directory(workdir):
+        odoo = None
+        try:
+            args = build_parser().parse_args(argv)
+            odoo = OdooConnector(target['url'], target['db'], target['username'], target['password'])
+            if odoo.connect(use_cache=not args.no_auth_cache):
+                output = run_cli_command(odoo, args, started_at)
+            else:
+                output['error'] = "No se pudo conectar con Odoo"
+        except (Exception, SystemExit) as e:
+            output['error'] = str(e) or "Argumentos no válidos"
+        finally:
+            if odoo is not None:
+                odoo.close()
+            os.environ.clear()
+            os.environ.update(saved_env)
+        writer.flush()
+    output['elapsed_s'] = round(time.perf_counter() - started_at, 2)
+    output['summary'] = dict(count_results(output.get('result')))
+    return output
+
+
+def run_targets(targets, argv, processes=None):
+    """Repartir el subcomando entre los destinos con un pool de procesos y combinar los resultados
+
+    Devuelve la salida combinada: ok (todos los destinos bien), result
+    ({destino: salida del subcomando, con su tiempo y su resumen por estado})
+    y summary (totales de todos los destinos).
+    """
+    processes = max(1, processes or env_int('ODOO_TARGET_PROCESSES', len(targets)))
+    started_at = time.perf_counter()
+    outputs = {}
+    with ProcessPoolExecutor(max_workers=min(processes, len(targets))) as pool:
+        futures = {target['name']: pool.submit(run_target, target, argv) for target in targets}
+        for name, future in futures.items():
+            try:
+                outputs[name] = future.result()
+            except Exception as e:
+                # El proceso del destino murió (p. ej. sin memoria): el resto sigue
+                outputs[name] = {'ok': False, 'result': None, 'error': f"El proceso terminó con error: {e}"}
+
+    elapsed = time.perf_counter() - started_at
+    totals = Counter()
+    for output in outputs.values():
+        totals.update(output.get('summary') or {})
+    items = sum(totals.values())
+
+    print(f"📊 {len(targets)} destino(s) en {elapsed:.1f} s:")
+    for name, output in outputs.items():
+        statuses = ', '.join(f"{status}={count}" for status, count in sorted((output.get('summary') or {}).items()))
+        print(f"   {'✅' if output['ok'] else '❌'} {name}: {statuses or output.get('error') or '-'}"
+              f" ({output.get('elapsed_s', 0):.1f} s)")
+    if items:
+        print(f"   Total: {items} elementos, {items / elapsed:.1f}/s")
+
+    return {
+        'ok': all(output['ok'] for output in outputs.values()),
+        'result': outputs,
+        'summary': {
+            'targets': len(targets),
+            'failed': [name for name, output in outputs.items() if not output['ok']],
+            'elapsed_s': round(elapsed, 2),
+            'statuses': dict(totals),
+        },
+    }
@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+"""
+Transporte HTTP para XML-RPC con pool de conexiones keep-alive y compresión gzip,
+y backend JSON-RPC alternativo sobre el mismo pool
+"""
+
+import base64
+import errno
+import functools
+import gzip
+import hashlib
+import http.client
+import itertools
+import json
+import threading
+import time
+import xmlrpc.client
+from collections import Counter
+from urllib.parse import urlsplit
+
+from odoo_config import env_flag, env_int, env_float
+
+
+class _CountingReader:
+    """Envoltorio de lectura que cuenta los bytes recibidos por la red"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.count = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.count += len(data)
+        return data
+
+
+class Base64Sink:
+    """Decodifica base64 por trozos y escribe los bytes en un archivo abierto
+
+    Guarda como mucho tres caracteres pendientes entre trozos, así que la
+    memoria usada no depende del tamaño del contenido.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.pending = ''
+        self.size = 0
+        self.digest = hashlib.sha1()
+        self.found = False
+
+    def write(self, text):
+        self.found = True
+        text = self.pending + ''.join(text.split())
+        cut = len(text) - len(text) % 4
+        self.pending = text[cut:]
+        if cut:
+            chunk = base64.b64decode(text[:cut])
+            self.file.write(chunk)
+            self.digest.update(chunk)
+            self.size += len(chunk)
+
+    def close(self):
+        if self.pending:
+            raise ValueError("Contenido base64 truncado")
+        return self.digest.hexdigest()
+
+
+class StreamingUnmarshaller(xmlrpc.client.Unmarshaller):
+    """Unmarshaller que manda el valor del campo `field` a un Base64Sink
+
+    El resto de la respuesta (ids, faults...) se decodifica como siempre;
+    el campo queda como cadena vacía en el resultado.
+    """
+
+    def __init__(self, field, sink):
+        super().__init__()
+        self.field = field
+        self.sink = sink
+        self.expecting = False  # el siguiente <value> es el del campo
+        self.capturing = False
+
+    def start(self, tag, attrs):
+        if self.capturing and tag != 'string':
+            # No es una cadena (p. ej. <boolean>0</boolean> sin contenido)
+            self.capturing = False
+        super().start(tag, attrs)
+        if self.expecting and tag == 'value':
+            self.expecting = False
+            self.capturing = True
+
+    def data(self, text):
+        if self.capturing:
+            self.sink.write(text)
+        else:
+            super().data(text)
+
+    def end(self, tag):
+        if tag == 'name':
+            self.expecting = ''.join(self._data) == self.field
+        elif self.capturing and tag in ('string', 'value'):
+            self.capturing = False
+        return super().end(tag)
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """Transporte XML-RPC con pool de conexiones HTTP/1.1 persistentes y gzip
+
+    Las conexiones se reutilizan entre llamadas (y entre los proxies `common`
+    y `object`), evitando un nuevo handshake TCP/TLS por cada `execute()`.
+    Cada hilo toma una conexión propia del pool mientras dura la petición.
+    """
+
+    def __init__(self, use_https=False, keepalive=True, pool_size=4,
+                 gzip_enabled=True, gzip_requests=False, gzip_threshold=1024, timeout=120,
+                 idle_timeout=30, context=None):
+        super().__init__()
+        self.use_https = use_https
+        self.keepalive = keepalive
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.context = context
+        # Aceptar respuestas comprimidas. Comprimir peticiones es opcional: Odoo
+        # no descomprime el cuerpo de /xmlrpc ni /jsonrpc, solo sirve con un
+        # proxy delante que lo haga
+        self.accept_gzip_encoding = gzip_enabled
+        self.encode_threshold = gzip_threshold if gzip_requests else None
+
+        self._idle = {}  # host -> [(conexión, último uso)]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = Counter()
+
+    @classmethod
+    def from_env(cls, url):
+        """Crear el transporte según la configuración del .env"""
+        return cls(
+            use_https=urlsplit(url or '').scheme == 'https',
+            keepalive=env_flag('ODOO_HTTP_KEEPALIVE', True),
+            pool_size=env_int('ODOO_HTTP_POOL_SIZE', 4),
+            gzip_enabled=env_flag('ODOO_HTTP_GZIP', True),
+            gzip_requests=env_flag('ODOO_HTTP_GZIP_REQUESTS', False),
+            gzip_threshold=env_int('ODOO_HTTP_GZIP_THRESHOLD', 1024),
+            timeout=env_float('ODOO_HTTP_TIMEOUT', 120),
+            idle_timeout=env_float('ODOO_HTTP_IDLE_TIMEOUT', 30),
+        )
+
+    def _count(self, **values):
+        with self._lock:
+            self.stats.update(values)
+        # Bytes de la llamada en curso de este hilo (instrumentación por RPC)
+        local = self._local
+        local.call_sent = getattr(local, 'call_sent', 0) + values.get('request_bytes_wire', 0)
+        local.call_received = getattr(local, 'call_received', 0) + values.get('response_bytes_wire', 0)
+
+    def reset_call_bytes(self):
+        """Poner a cero los bytes de la llamada en curso de este hilo"""
+        self._local.call_sent = 0
+        self._local.call_received = 0
+
+    def call_bytes(self):
+        """Bytes (enviados, recibidos) en la red desde el último reset_call_bytes() de este hilo"""
+        return getattr(self._local, 'call_sent', 0), getattr(self._local, 'call_received', 0)
+
+    # --- Gestión del pool ---
+
+    def _new_connection(self, host):
+        chost, _, x509 = self.get_host_info(host)
+        if self.use_https:
+            return http.client.HTTPSConnection(chost, timeout=self.timeout,
+                                               context=self.context, **(x509 or {}))
+        return http.client.HTTPConnection(chost, timeout=self.timeout)
+
+    def make_connection(self, host):
+        """Tomar una conexión libre del pool o abrir una nueva"""
+        conn = None
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.get(host, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    conn = candidate
+                    break
+                # Conexión inactiva demasiado tiempo: el servidor probablemente la cerró
+                candidate.close()
+                self.stats['connections_expired'] += 1
+
+        if conn is not None:
+            self._count(connections_reused=1)
+            self._local.reused = True
+        else:
+            conn = self._new_connection(host)
+            self._count(connections_opened=1)
+            self._local.reused = False
+        # Cabeceras de autenticación de la URL (user:pass@host), si las hubiera
+        self._extra_headers = self.get_host_info(host)[1]
+        self._local.current = (host, conn)
+        return conn
+
+    def _release(self):
+        """Devolver la conexión en uso al pool (o cerrarla sin keep-alive)"""
+        host, conn = getattr(self._local, 'current', (None, None))
+        self._local.current = (None, None)
+        if conn is None:
+            return
+        if self.keepalive:
+            with self._lock:
+                idle = self._idle.setdefault(host, [])
+                if len(idle) < self.pool_size:
+                    idle.append((conn, time.monotonic()))
+                    return
+        conn.close()
+
+    def close(self):
+        """Cerrar la conexión en uso por este hilo (estado desconocido tras un error)"""
+        host, conn = getattr(self._local, 'current', (None, None))
+        self._local.current = (None, None)
+        if conn is not None:
+            conn.close()
+
+    def close_all(self):
+        """Cerrar todas las conexiones del pool"""
+        self.close()
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+    # --- Ciclo de petición ---
+
+    def request(self, host, handler, request_body, verbose=False):
+        # Reintentar si una conexión reutilizada del pool estaba cerrada por el servidor
+        for attempt in range(self.pool_size + 1):
+            try:
+                return self.single_request(host, handler, request_body, verbose)
+            except http.client.RemoteDisconnected:
+                if not getattr(self._local, 'reused', False) or attempt == self.pool_size:
+                    raise
+            except OSError as e:
+                if (not getattr(self._local, 'reused', False) or attempt == self.pool_size
+                        or e.errno not in (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE)):
+                    raise
+            self._count(stale_retries=1)
+
+    def single_request(self, host, handler, request_body, verbose=False):
+        self._count(requests=1)
+        try:
+            result = super().single_request(host, handler, request_body, verbose)
+        except xmlrpc.client.Fault:
+            # Error de Odoo: la respuesta se leyó completa, la conexión sigue sana
+            self._release()
+            raise
+        except Exception:
+            self.close()
+            raise
+        self._release()
+        return result
+
+    def send_content(self, connection, request_body):
+        wire_body = request_body
+        if self.encode_threshold is not None and len(request_body) > self.encode_threshold:
+            connection.putheader("Content-Encoding", "gzip")
+            wire_body = gzip.compress(request_body)
+            self._count(requests_gzipped=1)
+        self._count(request_bytes_raw=len(request_body), request_bytes_wire=len(wire_body))
+
+        connection.putheader("Content-Length", str(len(wire_body)))
+        connection.endheaders(wire_body)
+
+    def parse_response(self, response, unmarshaller=None):
+        wire = _CountingReader(response)
+        compressed = response.getheader("Content-Encoding", "") == "gzip"
+        stream = gzip.GzipFile(mode='rb', fileobj=wire) if compressed else wire
+
+        if unmarshaller is None:
+            p, u = self.getparser()
+        else:
+            p, u = xmlrpc.client.ExpatParser(unmarshaller), unmarshaller
+        raw_bytes = 0
+        while True:
+            data = stream.read(65536)
+            if not data:
+                break
+            raw_bytes += len(data)
+            p.feed(data)
+        p.close()
+
+        self._count(response_bytes_raw=raw_bytes, response_bytes_wire=wire.count,
+                    responses_gzipped=int(compressed))
+        return u.close()
+
+    # --- Peticiones HTTP genéricas (rutas web de Odoo) ---
+
+    def open_request(self, host, method, path, body=None, headers=None):
+        """Enviar una petición HTTP por el pool y devolver la respuesta sin leer
+
+        El llamador debe leer la respuesta completa y luego llamar a
+        `finish_request(ok)` para devolver la conexión al pool o cerrarla.
+        """
+        for attempt in range(self.pool_size + 1):
+            conn = self.make_connection(host)
+            self._count(requests=1)
+            try:
+                conn.putrequest(method, path, skip_accept_encoding=True)
+                if self.accept_gzip_encoding:
+                    conn.putheader('Accept-Encoding', 'gzip')
+                for name, value in (headers or {}).items():
+                    conn.putheader(name, value)
+                if body is not None:
+                    self.send_content(conn, body)
+                else:
+                    conn.endheaders()
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError,
+                    ConnectionAbortedError, BrokenPipeError):
+                self.close()
+                if not getattr(self._local, 'reused', False) or attempt == self.pool_size:
+                    raise
+                self._count(stale_retries=1)
+            except Exception:
+                self.close()
+                raise
+
+    def stream_request(self, host, handler, request_body, unmarshaller):
+        """Llamada XML-RPC cuya respuesta se parsea con `unmarshaller` a medida que llega
+
+        Igual que request(), pero sin acumular la respuesta: sirve para
+        volcar contenidos grandes a disco con StreamingUnmarshaller.
+        """
+        response = self.open_request(host, 'POST', handler, request_body,
+                                     {'Content-Type': 'text/xml', 'User-Agent': self.user_agent})
+        try:
+            if response.status != 200:
+                response.read()
+                raise xmlrpc.client.ProtocolError(host + handler, response.status, response.reason,
+                                                  response.msg)
+            result = self.parse_response(response, unmarshaller)
+        except xmlrpc.client.Fault:
+            # Error de Odoo: la respuesta se leyó completa, la conexión sigue sana
+            self.finish_request(ok=not response.will_close)
+            raise
+        except Exception:
+            self.finish_request(ok=False)
+            raise
+        self.finish_request(ok=not response.will_close)
+        return result[0] if len(result) == 1 else result
+
+    def finish_request(self, ok=True):
+        """Devolver la conexión al pool tras leer la respuesta (o cerrarla si hubo error)"""
+        if ok:
+            self._release()
+        else:
+            self.close()
+
+    def http_request(self, host, method, path, body=None, headers=None):
+        """Petición HTTP completa: devuelve (status, cabeceras, cuerpo descomprimido)"""
+        response = self.open_request(host, method, path, body, headers)
+        try:
+            wire_body = response.read()
+        except Exception:
+            self.finish_request(ok=False)
+            raise
+        self.finish_request(ok=not response.will_close)
+
+        content = wire_body
+        if response.getheader('Content-Encoding', '') == 'gzip':
+            content = gzip.decompress(wire_body)
+        self._count(response_bytes_raw=len(content), response_bytes_wire=len(wire_body),
+                    responses_gzipped=int(content is not wire_body))
+        return response.status, {k.lower(): v for k, v in response.getheaders()}, content
+
+    # --- Estadísticas ---
+
+    def summary(self):
+        """Resumen de reutilización de conexiones y bytes ahorrados por gzip"""
+        with self._lock:
+            stats = dict(self.stats)
+        saved_request = stats.get('request_bytes_raw', 0) - stats.get('request_bytes_wire', 0)
+        saved_response = stats.get('response_bytes_raw', 0) - stats.get('response_bytes_wire', 0)
+        stats['bytes_saved'] = saved_request + saved_response
+        return stats
+
+
+class JsonRpcProxy:
+    """Proxy con la interfaz de ServerProxy sobre el endpoint /jsonrpc de Odoo
+
+    `JsonRpcProxy(url, 'object', transport).execute_kw(...)` equivale a la
+    llamada XML-RPC del mismo nombre. Evita el parseo XML (costoso con
+    respuestas grandes y con `datas` en base64) y reutiliza el pool de
+    conexiones del transporte. Los errores de Odoo se lanzan como
+    xmlrpc.client.Fault para mantener el mismo manejo que con XML-RPC.
+    """
+
+    def __init__(self, url, service, transport):
+        parts = urlsplit(url)
+        self.host = parts.netloc
+        self.path = parts.path.rstrip('/') + '/jsonrpc'
+        self.service = service
+        self.transport = transport
+        self._ids = itertools.count(1)
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        return functools.partial(self.call, method)
+
+    def call(self, method, *args):
+        body = json.dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': self.service, 'method': method, 'args': args},
+            'id': next(self._ids),
+        }).encode('utf-8')
+        status, headers, content = self.transport.http_request(
+            self.host, 'POST', self.path, body, {'Content-Type': 'application/json'})
+        if status != 200:
+            raise xmlrpc.client.ProtocolError(self.host + self.path, status,
+                                              http.client.responses.get(status, ''), headers)
+
+        response = json.loads(content)
+        error = response.get('error')
+        if error:
+            data = error.get('data') or {}
+            raise xmlrpc.client.Fault(error.get('code', 1),
+                                      data.get('message') or error.get('message', 'Error de Odoo'))
+        return response.get('result')
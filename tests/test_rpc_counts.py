@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Las lecturas de facturas van en bloque: el número de llamadas RPC de una
+orden no crece con la cantidad de facturas que tiene
+
+Se ejecuta contra el Odoo simulado de benchmarks/fake_odoo.py:
+    python3 -m pytest tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_odoo import FakeOdoo, FakeOdooServer  # noqa: E402
+from odoo_console import OdooConnector  # noqa: E402
+
+INVOICE_COUNTS = (1, 5, 20)
+# Lecturas y búsquedas: las que no deben repetirse por factura
+READ_METHODS = ('read', 'search', 'search_read', 'search_count')
+# Bajar el contenido de cada PDF sí es una lectura por adjunto
+BODY_FETCH = 'ir.attachment.read'
+
+
+class RpcCountTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.workdir.name)
+        self.previous_cache = os.environ.get('ODOO_CACHE_DIR')
+        self.servers = []
+
+    def tearDown(self):
+        for server, odoo in self.servers:
+            odoo.close()
+            server.stop()
+        os.chdir(self.previous_cwd)
+        if self.previous_cache is None:
+            os.environ.pop('ODOO_CACHE_DIR', None)
+        else:
+            os.environ['ODOO_CACHE_DIR'] = self.previous_cache
+        self.workdir.cleanup()
+
+    def connect(self, invoices):
+        """Conector contra un Odoo simulado que crea `invoices` facturas por orden"""
+        # Caché propia por servidor: sin metadatos ni réplica heredados de otra prueba
+        os.environ['ODOO_CACHE_DIR'] = os.path.join(self.workdir.name, f"cache_{invoices}")
+        fake = FakeOdoo('fake', partners=3, products=3, pdf_delay=0, invoices_per_order=invoices)
+        server = FakeOdooServer(fake).start()
+        odoo = OdooConnector(server.url, 'fake', 'admin', 'admin')
+        self.servers.append((server, odoo))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(odoo.connect())
+        return fake, odoo
+
+    def measure(self, invoices):
+        """Llamadas RPC de cada paso para una orden con `invoices` facturas"""
+        fake, odoo = self.connect(invoices)
+        calls = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            order_id = odoo.create_sale_order_with_type(
+                {'customer_id': 1, 'products': [{'product_id': 1, 'quantity': 1, 'price': 10}]}, 2)
+
+            def count(step, func):
+                before = odoo.stats['rpc_calls']
+                server_before = Counter(fake.stats)
+                result = func()
+                calls[step] = odoo.stats['rpc_calls'] - before
+                calls[f"{step}_reads"] = sum(
+                    calls_made for key, calls_made in (Counter(fake.stats) - server_before).items()
+                    if key.rsplit('.', 1)[-1] in READ_METHODS and key != BODY_FETCH)
+                return result
+
+            count('confirm', lambda: odoo.confirm_sale_order(order_id))
+            count('info', lambda: odoo.get_order_info(order_id))
+            files = count('pdf', lambda: odoo.download_order_invoices(order_id, max_wait=5, workers=1))
+            count('pdf_again', lambda: odoo.download_order_invoices(order_id, max_wait=5, workers=1))
+        self.assertEqual(len(files), invoices)
+        return calls
+
+    def test_rpc_count_does_not_grow_with_invoices(self):
+        results = {invoices: self.measure(invoices) for invoices in INVOICE_COUNTS}
+        baseline = results[INVOICE_COUNTS[0]]
+        for invoices, calls in results.items():
+            with self.subTest(invoices=invoices):
+                self.assertEqual(calls['confirm'], baseline['confirm'])
+                self.assertEqual(calls['info'], baseline['info'])
+                # Generar y bajar cada PDF es trabajo por factura; leer las facturas no
+                self.assertEqual(calls['pdf_reads'], baseline['pdf_reads'])
+                # Con los PDFs en el almacén local no se baja ni se genera nada
+                self.assertEqual(calls['pdf_again'], baseline['pdf_again'])
+
+
+if __name__ == '__main__':
+    unittest.main()